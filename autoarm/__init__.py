@@ -1,6 +1,8 @@
 __version__ = "0.1.0"
 
 from autoarm.association_rules import AssociationRules
+from autoarm.async_recommender import AsyncRecommender
 from autoarm.dataset import Dataset
 from autoarm.frequent_itemsets import FrequentItemsets
+from autoarm.profiler import Profiler
 from autoarm.recommender import Recommender
@@ -1,10 +1,19 @@
+import itertools
+
+import numpy as np
 import pandas as pd
 from mlxtend.frequent_patterns import association_rules
 
+from autoarm.profiler import _stage
+
 
 class AssociationRules:
     """
     AssociationRules contains association rules.
+    The engine is "mlxtend" or "native". "native" generates the rules without mlxtend and computes only support,
+    confidence and lift.
+    With prune_redundant, a rule is dropped if a rule with the same consequents and fewer antecedents has at least its
+    confidence. pruning_info() tells how many rules were dropped.
     """
     __RANK = "rank"
     __ANTECEDENTS = "antecedents"
@@ -12,6 +21,10 @@ class AssociationRules:
     __SUPPORT = "support"
     __CONFIDENCE = "confidence"
     __LIFT = "lift"
+    __ITEMSETS = "itemsets"
+    __MLXTEND = "mlxtend"
+    __NATIVE = "native"
+    __ENGINES = [__MLXTEND, __NATIVE]
     __COLUMNS = [__ANTECEDENTS, __CONSEQUENTS, __SUPPORT, __CONFIDENCE, __LIFT]
     __SORT_BY_ANTECEDENTS_CONSEQUENTS = [__ANTECEDENTS, __CONSEQUENTS]
     __SORT_BY_CONFIDENCE_SUPPORT_LIFT = [__CONFIDENCE, __SUPPORT, __LIFT]
@@ -21,8 +34,16 @@ class AssociationRules:
         __LIFT: __SORT_BY_LIFT_SUPPORT_CONFIDENCE,
     }
     __df = pd.DataFrame()
+    __n_generated_rules = 0
 
-    def __init__(self, frequent_itemsets, metric=None, min_threshold=0.8):
+    def __init__(
+        self,
+        frequent_itemsets,
+        metric=None,
+        min_threshold=0.8,
+        engine=None,
+        prune_redundant=False,
+    ):
         if metric is None:
             metric = self.__CONFIDENCE
         if self.__CONFIDENCE.__eq__(metric):
@@ -33,20 +54,208 @@ class AssociationRules:
                 raise ValueError()
         else:
             raise ValueError()
+        if engine is None:
+            engine = self.__MLXTEND
+        if engine not in self.__ENGINES:
+            raise ValueError()
         sort_by_columns = self.__DEFAULT_SORT_BY_COLUMNS[metric]
-        association_rules_df = association_rules(
-            frequent_itemsets.to_frame(), metric=metric, min_threshold=min_threshold
-        )
-        tmp_list = list()
-        while len(sort_by_columns) > len(tmp_list):
-            tmp_list.append(False)
-        tmp_df = association_rules_df.sort_values(
-            sort_by_columns, ascending=tmp_list
-        ).reset_index(drop=True)
-        self.__df = tmp_df[self.__COLUMNS]
+        n_itemsets = len(frequent_itemsets.to_frame())
+        with _stage("AssociationRules.__init__", n_itemsets) as stage:
+            with _stage("AssociationRules.__init__.generate", n_itemsets) as step:
+                if self.__NATIVE.__eq__(engine):
+                    association_rules_df = self.__generate_rules(
+                        frequent_itemsets.to_frame(), metric, min_threshold
+                    )
+                else:
+                    association_rules_df = association_rules(
+                        frequent_itemsets.to_frame(),
+                        metric=metric,
+                        min_threshold=min_threshold,
+                    )
+                step.output_rows = len(association_rules_df)
+            with _stage("AssociationRules.__init__.sort", len(association_rules_df)) as step:
+                if self.__NATIVE.__eq__(engine):
+                    self.__df = association_rules_df.sort_values(
+                        sort_by_columns, ascending=False, kind="mergesort"
+                    ).reset_index(drop=True)
+                else:
+                    tmp_list = list()
+                    while len(sort_by_columns) > len(tmp_list):
+                        tmp_list.append(False)
+                    tmp_df = association_rules_df.sort_values(
+                        sort_by_columns, ascending=tmp_list
+                    ).reset_index(drop=True)
+                    self.__df = tmp_df[self.__COLUMNS]
+                step.output_rows = len(self.__df)
+            self.__n_generated_rules = len(self.__df)
+            if prune_redundant:
+                with _stage("AssociationRules.__init__.prune", len(self.__df)) as step:
+                    self.__df = self.__prune_redundant_rules(self.__df)
+                    step.output_rows = len(self.__df)
+            stage.output_rows = len(self.__df)
 
     def to_frame(self):
         """
         Returns pandas.DataFrame.
         """
         return self.__df
+
+    def pruning_info(self):
+        """
+        Returns the numbers of the rules generated, pruned as redundant and kept as dict.
+        """
+        return {
+            "generated": self.__n_generated_rules,
+            "pruned": self.__n_generated_rules - len(self.__df),
+            "kept": len(self.__df),
+        }
+
+    def __prune_redundant_rules(self, rules_df):
+        """
+        Returns the rules without the redundant ones, in the same order.
+        A rule is redundant if a rule with the same consequents and a proper subset of its antecedents has at least its
+        confidence. That rule is matched whenever the redundant one is, and ranks at least as high on support,
+        confidence and lift, so Recommender.recommend() returns rows with the same metrics. Since the rules that tie
+        on the metrics are ordered by where they first appear, the consequents that tie may come in another order,
+        and one that ties with the n-th may take its place.
+        """
+        antecedents = rules_df[self.__ANTECEDENTS].tolist()
+        consequents = rules_df[self.__CONSEQUENTS].tolist()
+        confidences = rules_df[self.__CONFIDENCE].tolist()
+        confidence_by_rule = dict(zip(zip(antecedents, consequents), confidences))
+        is_redundant = np.zeros(len(rules_df), dtype=bool)
+        for i, (antecedent, consequent, confidence) in enumerate(
+            zip(antecedents, consequents, confidences)
+        ):
+            for size in range(len(antecedent) - 1, 0, -1):
+                for subset in itertools.combinations(antecedent, size):
+                    subset_confidence = confidence_by_rule.get((frozenset(subset), consequent))
+                    if subset_confidence is not None and subset_confidence >= confidence:
+                        is_redundant[i] = True
+                        break
+                if is_redundant[i]:
+                    break
+        return rules_df[~is_redundant].reset_index(drop=True)
+
+    def __generate_rules(self, frequent_itemsets_df, metric, min_threshold):
+        """
+        Returns the association rules of the frequent itemsets as pandas.DataFrame, in the order of generation.
+        The supports of the antecedents and consequents are looked up by a hash index of the itemsets of each length.
+        With confidence, a consequent is tried only if all of its subsets passed as consequents of the same itemset,
+        since the confidence does not increase as the antecedent gets smaller.
+        """
+        itemsets = frequent_itemsets_df[self.__ITEMSETS].to_numpy()
+        supports = frequent_itemsets_df[self.__SUPPORT].to_numpy(dtype=float)
+        item_ids = dict()
+        rows = [
+            sorted(item_ids.setdefault(item, len(item_ids)) for item in itemset)
+            for itemset in itemsets
+        ]
+        n_items = max(1, len(item_ids))
+        lengths = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+        positions_by_length = dict()
+        matrices_by_length = dict()
+        indexes_by_length = dict()
+        for length in np.unique(lengths).tolist():
+            positions = np.flatnonzero(lengths.__eq__(length))
+            matrix = np.array([rows[position] for position in positions], dtype=np.int64)
+            positions_by_length[length] = positions
+            matrices_by_length[length] = matrix.reshape(len(positions), length)
+            indexes_by_length[length] = self.__make_index(
+                matrices_by_length[length], n_items
+            )
+
+        def look_up(matrix):
+            length = matrix.shape[1]
+            if length not in indexes_by_length:
+                raise ValueError()
+            indexer = indexes_by_length[length].get_indexer(
+                self.__make_index(matrix, n_items)
+            )
+            if (indexer < 0).any():
+                raise ValueError()
+            return positions_by_length[length][indexer]
+
+        columns = {
+            self.__ANTECEDENTS: list(),
+            self.__CONSEQUENTS: list(),
+            self.__SUPPORT: list(),
+            self.__CONFIDENCE: list(),
+            self.__LIFT: list(),
+        }
+        for length in sorted(length for length in matrices_by_length if length > 1):
+            matrix = matrices_by_length[length]
+            itemset_supports = supports[positions_by_length[length]]
+            is_passed = np.ones((len(matrix), 1), dtype=bool)
+            consequents = [tuple()]
+            for size in range(1, length):
+                next_consequents = list(itertools.combinations(range(length), size))
+                if self.__CONFIDENCE.__eq__(metric):
+                    consequent_indices = {
+                        consequent: i for i, consequent in enumerate(consequents)
+                    }
+                    is_candidate = np.ones((len(matrix), len(next_consequents)), dtype=bool)
+                    for i, consequent in enumerate(next_consequents):
+                        for j in range(size):
+                            subset = consequent[:j] + consequent[j + 1:]
+                            is_candidate[:, i] &= is_passed[:, consequent_indices[subset]]
+                else:
+                    is_candidate = np.ones((len(matrix), len(next_consequents)), dtype=bool)
+                rule_rows, rule_consequents = np.nonzero(is_candidate)
+                consequent_columns = np.array(next_consequents, dtype=np.int64)
+                antecedent_columns = np.array(
+                    [
+                        [i for i in range(length) if i not in consequent]
+                        for consequent in next_consequents
+                    ],
+                    dtype=np.int64,
+                )
+                antecedent_positions = look_up(
+                    matrix[rule_rows[:, np.newaxis], antecedent_columns[rule_consequents]]
+                )
+                confidence = itemset_supports[rule_rows] / supports[antecedent_positions]
+                if self.__CONFIDENCE.__eq__(metric):
+                    is_rule = confidence >= min_threshold
+                    rule_rows = rule_rows[is_rule]
+                    rule_consequents = rule_consequents[is_rule]
+                    antecedent_positions = antecedent_positions[is_rule]
+                    confidence = confidence[is_rule]
+                consequent_positions = look_up(
+                    matrix[rule_rows[:, np.newaxis], consequent_columns[rule_consequents]]
+                )
+                lift = confidence / supports[consequent_positions]
+                if self.__LIFT.__eq__(metric):
+                    is_rule = lift >= min_threshold
+                    rule_rows = rule_rows[is_rule]
+                    rule_consequents = rule_consequents[is_rule]
+                    antecedent_positions = antecedent_positions[is_rule]
+                    consequent_positions = consequent_positions[is_rule]
+                    confidence = confidence[is_rule]
+                    lift = lift[is_rule]
+                is_passed = np.zeros((len(matrix), len(next_consequents)), dtype=bool)
+                is_passed[rule_rows, rule_consequents] = True
+                consequents = next_consequents
+                columns[self.__ANTECEDENTS].append(itemsets[antecedent_positions])
+                columns[self.__CONSEQUENTS].append(itemsets[consequent_positions])
+                columns[self.__SUPPORT].append(itemset_supports[rule_rows])
+                columns[self.__CONFIDENCE].append(confidence)
+                columns[self.__LIFT].append(lift)
+        data = dict()
+        for column, values in columns.items():
+            if len(values).__eq__(0):
+                dtype = object if column in self.__SORT_BY_ANTECEDENTS_CONSEQUENTS else float
+                data[column] = np.array([], dtype=dtype)
+            else:
+                data[column] = np.concatenate(values)
+        return pd.DataFrame(data)
+
+    @staticmethod
+    def __make_index(matrix, n_items):
+        """
+        Returns the hash index of the itemsets, the rows of the matrix of item ids less than n_items.
+        An itemset is a single integer key if the keys of its length fit in int64.
+        """
+        length = matrix.shape[1]
+        if n_items ** length < np.iinfo(np.int64).max:
+            return pd.Index(matrix @ (n_items ** np.arange(length, dtype=np.int64)))
+        return pd.MultiIndex.from_arrays(list(matrix.T))
@@ -0,0 +1,166 @@
+import asyncio
+import functools
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+class AsyncRecommender:
+    """
+    AsyncRecommender recommends with Recommender from coroutines.
+    The requests that arrive within max_wait seconds, up to max_batch_size of them, are matched together by
+    recommend_batch() in a worker thread, so that the event loop is not blocked.
+    The latencies of the last requests are kept for latency_percentiles().
+    The pending requests belong to the event loop of the last request. A request from another event loop, for example
+    after asyncio.run() returned, drops those of the earlier one.
+    """
+    __BASKET_ID = "basket_id"
+    __DEFAULT_MAX_BATCH_SIZE = 64
+    __DEFAULT_MAX_WAIT = 0.002
+    __DEFAULT_PERCENTILES = [50, 90, 99]
+    __MAX_LATENCIES = 10000
+
+    def __init__(self, recommender, max_batch_size=None, max_wait=None):
+        if max_batch_size is None:
+            max_batch_size = self.__DEFAULT_MAX_BATCH_SIZE
+        if max_batch_size < 1:
+            raise ValueError()
+        if max_wait is None:
+            max_wait = self.__DEFAULT_MAX_WAIT
+        if max_wait < 0:
+            raise ValueError()
+        self.__recommender = recommender
+        self.__max_batch_size = max_batch_size
+        self.__max_wait = max_wait
+        self.__executor = ThreadPoolExecutor(max_workers=1)
+        self.__pending = list()
+        self.__timer = None
+        self.__loop = None
+        self.__tasks = set()
+        self.__latencies = deque(maxlen=self.__MAX_LATENCIES)
+
+    async def recommend(
+        self, items, n=None, metric=None, allow_from_items=None, sort_by_columns=None
+    ):
+        """
+        Returns association rules that are useful for recommendations, the same as Recommender.recommend().
+        """
+        items = frozenset(items)
+        if len(items) < 1:
+            raise ValueError()
+        if sort_by_columns is not None:
+            sort_by_columns = tuple(sort_by_columns)
+        loop = asyncio.get_running_loop()
+        if self.__loop is not loop:
+            self.__loop = loop
+            self.__pending = list()
+            self.__timer = None
+        future = loop.create_future()
+        self.__pending.append(
+            (
+                (n, metric, allow_from_items, sort_by_columns),
+                items,
+                future,
+                time.perf_counter(),
+            )
+        )
+        if len(self.__pending) >= self.__max_batch_size:
+            self.__flush()
+        elif self.__timer is None:
+            self.__timer = loop.call_later(self.__max_wait, self.__flush)
+        return await future
+
+    def latency_percentiles(self, percentiles=None):
+        """
+        Returns the percentiles of the latencies of the last requests in seconds as dict.
+        """
+        if percentiles is None:
+            percentiles = self.__DEFAULT_PERCENTILES
+        if len(self.__latencies).__eq__(0):
+            return {percentile: np.nan for percentile in percentiles}
+        values = np.percentile(np.fromiter(self.__latencies, dtype=float), percentiles)
+        return dict(zip(percentiles, values.tolist()))
+
+    def close(self):
+        """
+        Shut down the worker thread after the running batch.
+        """
+        self.__executor.shutdown(wait=True)
+
+    def __flush(self):
+        """
+        Start matching the pending requests, a batch for each combination of the arguments.
+        The timer of an event loop that is no longer that of the pending requests does nothing.
+        """
+        loop = asyncio.get_running_loop()
+        if self.__loop is not loop:
+            return
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+        pending, self.__pending = self.__pending, list()
+        requests_by_arguments = dict()
+        for request in pending:
+            requests_by_arguments.setdefault(request[0], list()).append(request)
+        for arguments, requests in requests_by_arguments.items():
+            task = loop.create_task(self.__recommend_batch(arguments, requests))
+            self.__tasks.add(task)
+            task.add_done_callback(self.__tasks.discard)
+
+    async def __recommend_batch(self, arguments, requests):
+        """
+        Match the requests by recommend_batch(), or by recommend() if there is only one, in the worker thread.
+        """
+        n, metric, allow_from_items, sort_by_columns = arguments
+        if sort_by_columns is not None:
+            sort_by_columns = list(sort_by_columns)
+        baskets = [items for _, items, _, _ in requests]
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self.__executor,
+                functools.partial(
+                    self.__recommend_in_worker,
+                    baskets,
+                    n=n,
+                    metric=metric,
+                    allow_from_items=allow_from_items,
+                    sort_by_columns=sort_by_columns,
+                ),
+            )
+        except Exception as e:
+            for _, _, future, _ in requests:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finished_at = time.perf_counter()
+        for (_, _, future, started_at), recommend_rules in zip(requests, results):
+            if future.done():
+                continue
+            future.set_result(recommend_rules)
+            self.__latencies.append(finished_at - started_at)
+
+    def __recommend_in_worker(self, baskets, **kwargs):
+        """
+        Returns the recommendations of each of the baskets as a list of pandas.DataFrame.
+        """
+        if len(baskets).__eq__(1):
+            return [self.__recommender.recommend(baskets[0], **kwargs)]
+        recommend_rules = self.__recommender.recommend_batch(baskets, **kwargs)
+        n_rows = len(recommend_rules) // len(baskets)
+        columns = [
+            column for column in recommend_rules.columns if column != self.__BASKET_ID
+        ]
+        values = [recommend_rules[column].to_numpy() for column in columns]
+        return [
+            pd.DataFrame(
+                {
+                    column: column_values[i * n_rows:(i + 1) * n_rows]
+                    for column, column_values in zip(columns, values)
+                }
+            )
+            for i in range(len(baskets))
+        ]
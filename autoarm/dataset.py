@@ -1,25 +1,173 @@
+import numpy as np
 import pandas as pd
-from mlxtend.preprocessing import TransactionEncoder
+from scipy import sparse as sp
+
+from autoarm.profiler import _stage
 
 
 class Dataset:
     """
     Dataset contains dataset and has been converted to a format suitable for later processes.
+    With sparse=True, the dataset is held as sparse boolean columns instead of a dense boolean matrix.
     """
+    __PARQUET_SUFFIXES = (".parquet", ".pq")
+    __DEFAULT_CHUNKSIZE = 1000000
     __df = pd.DataFrame()
 
-    def __init__(self, df, transaction_column, item_column):
+    def __init__(self, df, transaction_column, item_column, sparse=False):
         if transaction_column not in df.columns.tolist():
             raise ValueError()
         if item_column not in df.columns.tolist():
             raise ValueError()
-        tmp_df = df.groupby(transaction_column)[item_column].apply(list)
-        transaction_encoder = TransactionEncoder()
-        tmp_df2 = transaction_encoder.fit(tmp_df).transform(tmp_df)
-        self.__df = pd.DataFrame(tmp_df2, columns=transaction_encoder.columns_)
+        with _stage("Dataset.__init__", len(df)) as stage:
+            with _stage("Dataset.__init__.encode", len(df)) as step:
+                matrix, items = self.__encode(df[transaction_column], df[item_column])
+                step.output_rows = matrix.shape[0]
+            with _stage("Dataset.__init__.make_frame", matrix.shape[0]) as step:
+                self.__df = self.__make_frame(matrix, items, sparse)
+                step.output_rows = len(self.__df)
+            stage.output_rows = len(self.__df)
+
+    @classmethod
+    def from_files(
+        cls, paths, transaction_column, item_column, chunksize=None, sparse=False
+    ):
+        """
+        Returns Dataset read from CSV or Parquet files chunk by chunk.
+        Only the codes of the transactions and items are kept between chunks, so a transaction may span chunks and files.
+        Files whose names end with .parquet or .pq are read as Parquet, which needs pyarrow, and the others as CSV,
+        whose transactions and items are read as strings.
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+        if chunksize is None:
+            chunksize = cls.__DEFAULT_CHUNKSIZE
+        if chunksize < 1:
+            raise ValueError()
+        dataset = cls.__new__(cls)
+        with _stage("Dataset.from_files") as stage:
+            transaction_labels = pd.Index([], dtype=object)
+            item_labels = pd.Index([], dtype=object)
+            transaction_codes = list()
+            item_codes = list()
+            with _stage("Dataset.from_files.encode") as step:
+                for chunk in dataset.__read_chunks(
+                    paths, transaction_column, item_column, chunksize
+                ):
+                    codes, transaction_labels = dataset.__encode_chunk(
+                        chunk[transaction_column], transaction_labels
+                    )
+                    transaction_codes.append(codes)
+                    codes, item_labels = dataset.__encode_chunk(chunk[item_column], item_labels)
+                    item_codes.append(codes)
+                transaction_codes = np.concatenate(
+                    [np.empty(0, np.int64), *transaction_codes]
+                )
+                item_codes = np.concatenate([np.empty(0, np.int64), *item_codes])
+                transaction_codes, _ = dataset.__sort_codes(
+                    transaction_codes, transaction_labels
+                )
+                item_codes, items = dataset.__sort_codes(item_codes, item_labels)
+                matrix = dataset.__make_matrix(
+                    transaction_codes, len(transaction_labels), item_codes, len(item_labels)
+                )
+                step.input_rows = len(item_codes)
+                step.output_rows = matrix.shape[0]
+            with _stage("Dataset.from_files.make_frame", matrix.shape[0]) as step:
+                dataset.__df = dataset.__make_frame(matrix, items, sparse)
+                step.output_rows = len(dataset.__df)
+            stage.input_rows = len(item_codes)
+            stage.output_rows = len(dataset.__df)
+        return dataset
 
     def to_frame(self):
         """
         Returns pandas.DataFrame.
         """
         return self.__df
+
+    def __encode(self, transactions, items):
+        """
+        Encode the transactions as a sparse boolean matrix of transactions by items.
+        Both columns are factorized in sorted order, and the item labels are returned as the vocabulary of the columns.
+        """
+        transaction_codes, transaction_labels = pd.factorize(transactions, sort=True)
+        item_codes, item_labels = pd.factorize(items, sort=True)
+        matrix = self.__make_matrix(
+            transaction_codes, len(transaction_labels), item_codes, len(item_labels)
+        )
+        return matrix, item_labels
+
+    def __make_matrix(self, transaction_codes, n_transactions, item_codes, n_items):
+        """
+        Make a sparse boolean matrix of transactions by items from the codes. Negative codes are missing values.
+        """
+        is_valid = (transaction_codes >= 0) & (item_codes >= 0)
+        matrix = sp.csr_matrix(
+            (
+                np.ones(is_valid.sum(), dtype=bool),
+                (transaction_codes[is_valid], item_codes[is_valid]),
+            ),
+            shape=(n_transactions, n_items),
+        )
+        matrix.sum_duplicates()
+        return matrix
+
+    def __make_frame(self, matrix, items, sparse):
+        """
+        Make pandas.DataFrame of the matrix whose columns are the items.
+        """
+        if sparse:
+            return pd.DataFrame.sparse.from_spmatrix(matrix, columns=items)
+        return pd.DataFrame(matrix.toarray(), columns=items)
+
+    def __read_chunks(self, paths, transaction_column, item_column, chunksize):
+        """
+        Read the transaction and item columns of the files, chunksize rows at a time.
+        """
+        for path in paths:
+            if str(path).lower().endswith(self.__PARQUET_SUFFIXES):
+                import pyarrow.parquet as pq
+
+                parquet_file = pq.ParquetFile(path)
+                if transaction_column not in parquet_file.schema_arrow.names:
+                    raise ValueError()
+                if item_column not in parquet_file.schema_arrow.names:
+                    raise ValueError()
+                for batch in parquet_file.iter_batches(
+                    batch_size=chunksize, columns=[transaction_column, item_column]
+                ):
+                    yield batch.to_pandas()
+            else:
+                columns = pd.read_csv(path, nrows=0).columns.tolist()
+                if transaction_column not in columns:
+                    raise ValueError()
+                if item_column not in columns:
+                    raise ValueError()
+                yield from pd.read_csv(
+                    path,
+                    usecols=[transaction_column, item_column],
+                    dtype=str,
+                    chunksize=chunksize,
+                )
+
+    def __encode_chunk(self, values, labels):
+        """
+        Encode the values of a chunk with the positions of their labels among the labels seen so far, and returns the
+        codes and the labels with the new ones appended.
+        """
+        codes, chunk_labels = pd.factorize(values)
+        chunk_ids = labels.get_indexer(chunk_labels).astype(np.int64)
+        is_new = chunk_ids < 0
+        chunk_ids[is_new] = len(labels) + np.arange(is_new.sum())
+        labels = labels.append(pd.Index(chunk_labels[is_new]))
+        return np.append(chunk_ids, -1)[codes], labels
+
+    def __sort_codes(self, codes, labels):
+        """
+        Renumber the codes in sorted order of their labels, and returns them with the sorted labels.
+        """
+        order = labels.argsort()
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[order] = np.arange(len(order))
+        return np.append(ranks, -1)[codes], labels[order]
@@ -1,26 +1,967 @@
+import gc
+import heapq
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
-from mlxtend.frequent_patterns import apriori
+from mlxtend.frequent_patterns import apriori, fpgrowth, fpmax, hmine
+from mlxtend.frequent_patterns.apriori import generate_new_combinations
+from scipy import sparse
+
+from autoarm.profiler import _stage
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
 
 
 class FrequentItemsets:
     """
     FrequentItemsets contains frequent itemsets.
+    The algorithm is one of "apriori", "fpgrowth", "fpmax", "hmine", "bitset", "eclat" and "declat". "fpmax" mines
+    only the maximal itemsets, and "bitset" is apriori counting the candidates on the transactions of each item packed
+    into bits. "eclat" mines depth first on the transaction id lists of the itemsets, and "declat" on their diffsets.
+    max_len caps the length of the itemsets. low_memory makes apriori count the candidates one by one, and
+    memory_budget makes apriori and "bitset" count them in chunks that fit in that many bytes. The other algorithms
+    do not take them.
+    The transaction count of each itemset is kept, so that update() can add transactions without mining them all again.
+    With n_jobs > 1, the transactions are split into n_jobs partitions that are mined and counted in parallel processes.
+    With top_k, the top_k most frequent itemsets of at least min_support, and those that tie with the last of them,
+    are mined by "eclat" or "declat" without choosing min_support, raising the bar of support during the search.
+    With closed, only the closed itemsets are kept, those without a superset of the same support. AssociationRules
+    needs all the frequent itemsets, so closed itemsets are a compact summary rather than an input to it.
+    With epsilon, the itemsets are mined at min_support - epsilon on a random sample of the transactions, large enough
+    that the supports in it are all within epsilon of the exact ones with probability at least 1 - delta. With verify,
+    the itemsets are then counted in all the transactions, and those of at least min_support are kept with exact supports.
     """
     __SUPPORT = "support"
+    __ITEMSETS = "itemsets"
+    __APRIORI = "apriori"
+    __FPGROWTH = "fpgrowth"
+    __FPMAX = "fpmax"
+    __HMINE = "hmine"
+    __BITSET = "bitset"
+    __ECLAT = "eclat"
+    __DECLAT = "declat"
+    __ALGORITHMS = {
+        __APRIORI: apriori,
+        __FPGROWTH: fpgrowth,
+        __FPMAX: fpmax,
+        __HMINE: hmine,
+    }
+    __NATIVE_ALGORITHMS = [__BITSET, __ECLAT, __DECLAT]
+    __COUNTING_BUDGET = 64 * 1024 ** 2
+    __DEFAULT_MIN_SUPPORT = 0.5
+    __DEFAULT_DELTA = 0.1
     __df = pd.DataFrame()
+    __counts = np.empty(0, dtype=np.int64)
+    __n_transactions = 0
+    __datasets = list()
+    __options = dict()
+    __low_memory = False
+    __peak_rss = None
+    __sample_size = None
+
+    def __init__(
+        self,
+        dataset,
+        min_support=None,
+        algorithm=None,
+        max_len=None,
+        low_memory=False,
+        memory_budget=None,
+        n_jobs=None,
+        top_k=None,
+        closed=False,
+        epsilon=None,
+        delta=None,
+        verify=False,
+        random_state=None,
+    ):
+        options = self.__validate_options(
+            dataset,
+            dict(
+                min_support=min_support,
+                algorithm=algorithm,
+                max_len=max_len,
+                low_memory=low_memory,
+                memory_budget=memory_budget,
+                n_jobs=n_jobs,
+                top_k=top_k,
+                closed=closed,
+                epsilon=epsilon,
+                delta=delta,
+                verify=verify,
+                random_state=random_state,
+            ),
+        )
+        with _stage("FrequentItemsets.__init__", len(dataset.to_frame())) as stage:
+            df = dataset.to_frame()
+            mining_min_support = options["min_support"]
+            if options["epsilon"] is not None:
+                with _stage("FrequentItemsets.__init__.sample", len(df)) as step:
+                    df, mining_min_support = self.__sample(df, options)
+                    step.output_rows = len(df)
+            with _stage("FrequentItemsets.__init__.mine", len(df)) as step:
+                is_reset, start_peak_rss = self.__reset_peak_rss()
+                frequent_items_df = self.__mine(df, mining_min_support, options)
+                self.__peak_rss = self.__measure_peak_rss(is_reset, start_peak_rss)
+                step.output_rows = len(frequent_items_df)
+            if options["verify"] and self.__sample_size is not None:
+                with _stage(
+                    "FrequentItemsets.__init__.verify", len(frequent_items_df)
+                ) as step:
+                    frequent_items_df = self.__verify(
+                        dataset.to_frame(), frequent_items_df, options["min_support"]
+                    )
+                    step.output_rows = len(frequent_items_df)
+            with _stage("FrequentItemsets.__init__.sort", len(frequent_items_df)) as step:
+                frequent_items_df[self.__SUPPORT] = frequent_items_df[
+                    self.__SUPPORT
+                ].astype(float)
+                self.__df = frequent_items_df.sort_values(
+                    self.__SUPPORT, ascending=False
+                ).reset_index(drop=True)
+                self.__n_transactions = len(dataset.to_frame())
+                self.__counts = np.rint(
+                    self.__df[self.__SUPPORT].to_numpy() * self.__n_transactions
+                ).astype(np.int64)
+                step.output_rows = len(self.__df)
+            if options["closed"]:
+                with _stage("FrequentItemsets.__init__.close", len(self.__df)) as step:
+                    is_closed = self.__find_closed()
+                    self.__df = self.__df[is_closed].reset_index(drop=True)
+                    self.__counts = self.__counts[is_closed]
+                    step.output_rows = len(self.__df)
+            self.__datasets = [dataset]
+            self.__options = options
+            stage.output_rows = len(self.__df)
+            stage.itemsets_by_length = self.__count_by_length()
+
+    def to_frame(self):
+        """
+        Returns pandas.DataFrame.
+        """
+        return self.__df
 
-    def __init__(self, dataset, min_support=0.5):
-        if not 0 < min_support <= 1:
+    def update(self, dataset):
+        """
+        Add the transactions of the dataset, and returns the itemsets that became frequent and those that did not stay
+        frequent.
+        Following FUP, the itemsets known to be frequent are counted in the new transactions only, and the earlier
+        transactions are scanned only for the itemsets that are frequent in the new transactions but were not before.
+        """
+        if self.__FPMAX.__eq__(self.__options["algorithm"]):
+            raise ValueError()
+        if self.__options["top_k"] is not None or self.__options["closed"]:
             raise ValueError()
-        frequent_items_df = apriori(
-            dataset.to_frame(), min_support=min_support, use_colnames=True
+        if self.__options["epsilon"] is not None:
+            raise ValueError()
+        min_support = self.__options["min_support"]
+        n_transactions = self.__n_transactions + len(dataset.to_frame())
+        itemsets = self.__df[self.__ITEMSETS].tolist()
+        counts = self.__counts + self.__count_itemsets(dataset.to_frame(), itemsets)
+        is_frequent = counts / n_transactions >= min_support
+
+        increment_df = FrequentItemsets(dataset, **self.__options).to_frame()
+        known_itemsets = frozenset(itemsets)
+        is_candidate = ~increment_df[self.__ITEMSETS].isin(known_itemsets).to_numpy()
+        candidates = increment_df[self.__ITEMSETS][is_candidate].tolist()
+        candidate_counts = np.rint(
+            increment_df[self.__SUPPORT][is_candidate].to_numpy()
+            * len(dataset.to_frame())
+        ).astype(np.int64)
+        for old_dataset in self.__datasets:
+            candidate_counts += self.__count_itemsets(old_dataset.to_frame(), candidates)
+        is_added = candidate_counts / n_transactions >= min_support
+
+        dropped_df = pd.DataFrame(
+            {
+                self.__SUPPORT: counts[~is_frequent] / n_transactions,
+                self.__ITEMSETS: self.__df[self.__ITEMSETS][~is_frequent].tolist(),
+            }
+        )
+        added_df = pd.DataFrame(
+            {
+                self.__SUPPORT: candidate_counts[is_added] / n_transactions,
+                self.__ITEMSETS: [
+                    itemset for itemset, added in zip(candidates, is_added) if added
+                ],
+            }
+        )
+        tmp_df = pd.DataFrame(
+            {
+                self.__SUPPORT: np.concatenate(
+                    [counts[is_frequent], candidate_counts[is_added]]
+                )
+                / n_transactions,
+                self.__ITEMSETS: self.__df[self.__ITEMSETS][is_frequent].tolist()
+                + added_df[self.__ITEMSETS].tolist(),
+            }
+        )
+        order = np.argsort(-tmp_df[self.__SUPPORT].to_numpy(), kind="stable")
+        self.__df = tmp_df.iloc[order].reset_index(drop=True)
+        self.__counts = np.concatenate([counts[is_frequent], candidate_counts[is_added]])[
+            order
+        ]
+        self.__n_transactions = n_transactions
+        self.__datasets.append(dataset)
+        return (
+            added_df.sort_values(self.__SUPPORT, ascending=False).reset_index(drop=True),
+            dropped_df.sort_values(self.__SUPPORT, ascending=False).reset_index(
+                drop=True
+            ),
+        )
+
+    def is_low_memory(self):
+        """
+        Returns whether apriori had to count the candidates one by one or in chunks.
+        """
+        return self.__low_memory
+
+    def peak_rss(self):
+        """
+        Returns the peak resident set size of the process in bytes while mining, or None if unavailable.
+        On Linux, the high-water mark of the process is reset before mining. Elsewhere, the peak is only known
+        when mining raised the high-water mark of the process, and is None otherwise.
+        """
+        return self.__peak_rss
+
+    def sample_size(self):
+        """
+        Returns the number of the transactions sampled to mine, or None if all the transactions were mined.
+        """
+        return self.__sample_size
+
+    def __validate_options(self, dataset, options):
+        """
+        Returns the options with their defaults filled in, or raises ValueError if they are invalid or not honoured.
+        Without top_k, min_support defaults to 0.5 and the algorithm to apriori, and with top_k, they default to any
+        itemset and "eclat".
+        """
+        options = dict(options)
+        top_k = options["top_k"]
+        if options["min_support"] is None and top_k is None:
+            options["min_support"] = self.__DEFAULT_MIN_SUPPORT
+        elif options["min_support"] is None:
+            options["min_support"] = 1 / max(1, len(dataset.to_frame()))
+        if options["algorithm"] is None and top_k is None:
+            options["algorithm"] = self.__APRIORI
+        elif options["algorithm"] is None:
+            options["algorithm"] = self.__ECLAT
+        if options["delta"] is None:
+            options["delta"] = self.__DEFAULT_DELTA
+        min_support = options["min_support"]
+        algorithm = options["algorithm"]
+        max_len = options["max_len"]
+        memory_budget = options["memory_budget"]
+        is_parallel = options["n_jobs"] is not None and options["n_jobs"] > 1
+        epsilon = options["epsilon"]
+        is_invalid = [
+            top_k is not None and top_k < 1,
+            not 0 < min_support <= 1,
+            algorithm not in list(self.__ALGORITHMS) + self.__NATIVE_ALGORITHMS,
+            top_k is not None and algorithm not in [self.__ECLAT, self.__DECLAT],
+            max_len is not None and max_len < 1,
+            memory_budget is not None and memory_budget < 1,
+            options["low_memory"] and not self.__APRIORI.__eq__(algorithm),
+            memory_budget is not None and algorithm not in [self.__APRIORI, self.__BITSET],
+            options["n_jobs"] is not None and options["n_jobs"] < 1,
+            is_parallel and (top_k is not None or self.__FPMAX.__eq__(algorithm)),
+            epsilon is not None and not 0 < epsilon < min_support,
+            epsilon is not None and not 0 < options["delta"] < 1,
+            epsilon is not None and top_k is not None,
+            epsilon is not None and options["verify"] and self.__FPMAX.__eq__(algorithm),
+        ]
+        if any(is_invalid):
+            raise ValueError()
+        return options
+
+    def __mine(self, df, min_support, options):
+        """
+        Mine frequent itemsets of at least min_support on the dataset with the algorithm of the options.
+        """
+        algorithm = options["algorithm"]
+        max_len = options["max_len"]
+        memory_budget = options["memory_budget"]
+        if len(df).__eq__(0) or len(df.columns).__eq__(0):
+            return pd.DataFrame(
+                {
+                    self.__SUPPORT: np.empty(0, dtype=float),
+                    self.__ITEMSETS: np.empty(0, dtype=object),
+                }
+            )
+        if options["n_jobs"] is not None and options["n_jobs"] > 1:
+            return self.__mine_partitioned(
+                df,
+                options["n_jobs"],
+                dict(
+                    min_support=min_support,
+                    algorithm=algorithm,
+                    max_len=max_len,
+                    low_memory=options["low_memory"],
+                    memory_budget=memory_budget,
+                ),
+            )
+        if self.__APRIORI.__eq__(algorithm) and options["low_memory"]:
+            self.__low_memory = True
+            return apriori(
+                df,
+                min_support=min_support,
+                use_colnames=True,
+                max_len=max_len,
+                low_memory=True,
+            )
+        if self.__APRIORI.__eq__(algorithm) and memory_budget is not None:
+            return self.__apriori_within_budget(df, min_support, max_len, memory_budget)
+        if self.__BITSET.__eq__(algorithm):
+            return self.__mine_bitsets(df, min_support, max_len, memory_budget)
+        if algorithm in [self.__ECLAT, self.__DECLAT]:
+            return self.__mine_eclat(
+                df,
+                min_support,
+                max_len,
+                use_diffsets=self.__DECLAT.__eq__(algorithm),
+                top_k=options["top_k"],
+            )
+        return self.__ALGORITHMS[algorithm](
+            df,
+            min_support=min_support,
+            use_colnames=True,
+            max_len=max_len,
+        )
+
+    def __sample(self, df, options):
+        """
+        Returns the transactions drawn at random with replacement, in the format of the dataset, and the support to
+        mine them at. The dataset itself is returned if the sample would not be smaller.
+        """
+        matrix = self.__to_matrix(df)
+        sample_size = _to_sample_size(matrix, options["epsilon"], options["delta"])
+        if sample_size >= len(df):
+            return df, options["min_support"]
+        self.__sample_size = sample_size
+        positions = np.random.default_rng(options["random_state"]).integers(
+            0, len(df), size=sample_size
+        )
+        if isinstance(matrix, np.ndarray):
+            sample_df = pd.DataFrame(matrix[positions], columns=df.columns)
+        else:
+            sample_df = pd.DataFrame.sparse.from_spmatrix(
+                matrix.tocsr()[positions], columns=df.columns
+            )
+        return sample_df, options["min_support"] - options["epsilon"]
+
+    def __verify(self, df, frequent_items_df, min_support):
+        """
+        Count the itemsets mined on a sample in all the transactions, and returns those of at least min_support.
+        """
+        itemsets = frequent_items_df[self.__ITEMSETS].tolist()
+        supports = self.__count_itemsets(df, itemsets) / max(1, len(df))
+        is_frequent = supports >= min_support
+        return pd.DataFrame(
+            {
+                self.__SUPPORT: supports[is_frequent],
+                self.__ITEMSETS: [
+                    itemset for itemset, frequent in zip(itemsets, is_frequent) if frequent
+                ],
+            }
+        )
+
+    def __find_closed(self):
+        """
+        Returns whether each itemset is closed, that is, no itemset one item longer has the same transaction count.
+        A longer superset with the same count would imply such an itemset in between.
+        """
+        itemsets = self.__df[self.__ITEMSETS].tolist()
+        counts = self.__counts.tolist()
+        positions = {itemset: position for position, itemset in enumerate(itemsets)}
+        is_closed = np.ones(len(itemsets), dtype=bool)
+        for itemset, count in zip(itemsets, counts):
+            if len(itemset) < 2:
+                continue
+            for item in itemset:
+                position = positions.get(itemset - {item})
+                if position is not None and counts[position].__eq__(count):
+                    is_closed[position] = False
+        return is_closed
+
+    def __count_by_length(self):
+        """
+        Returns the number of the itemsets of each length as dict.
+        """
+        lengths = self.__df[self.__ITEMSETS].map(len).value_counts().sort_index()
+        return {int(length): int(count) for length, count in lengths.items()}
+
+    def __apriori_within_budget(self, df, min_support, max_len, memory_budget):
+        """
+        Mine frequent itemsets with apriori, level by level.
+        The candidates of a level are the same as those of mlxtend, and they are counted in chunks so that
+        the boolean matrix of transactions by candidates does not exceed the memory budget.
+        """
+        matrix = self.__to_matrix(df)
+        n_transactions = matrix.shape[0]
+
+        def count_candidates(candidates):
+            if n_transactions * candidates.size > memory_budget:
+                self.__low_memory = True
+            return _count_candidates(matrix, candidates, memory_budget)
+
+        return self.__mine_by_level(
+            df.columns,
+            n_transactions,
+            np.asarray(matrix.sum(axis=0)).ravel(),
+            min_support,
+            max_len,
+            count_candidates,
+        )
+
+    def __mine_bitsets(self, df, min_support, max_len, memory_budget):
+        """
+        Mine frequent itemsets with apriori, level by level, counting the candidates on bitsets.
+        The transactions of each item are packed into the bits of uint64 words, and the transactions that contain
+        a candidate are the popcount of the AND of the bitsets of its items, in chunks within the memory budget.
+        """
+        if memory_budget is None:
+            memory_budget = self.__COUNTING_BUDGET
+        bitsets = _pack_bitsets(self.__to_matrix(df))
+        return self.__mine_by_level(
+            df.columns,
+            len(df),
+            _popcount(bitsets),
+            min_support,
+            max_len,
+            lambda candidates: _count_bitsets(bitsets, candidates, memory_budget),
+        )
+
+    def __mine_eclat(self, df, min_support, max_len, use_diffsets=False, top_k=None):
+        """
+        Mine frequent itemsets with Eclat, depth first on the sorted ids of the transactions that contain each itemset.
+        With use_diffsets (dEclat), an itemset below the first level keeps the ids of the transactions that contain
+        its prefix but not itself, which are much fewer on dense datasets.
+        With top_k, the transaction count of the top_k-th itemset found so far is the bar to extend an itemset, so
+        the bar rises during the search, and the itemsets that reach the final bar are returned. The bar starts from
+        the top_k largest counts of the items and of the pairs of the most frequent items, counted at once by a sparse
+        product and selected by a partition, and an itemset is not extended by an item whose pair with its last item
+        is below the bar.
+        """
+        matrix = sparse.csc_matrix(self.__to_matrix(df))
+        n_transactions = matrix.shape[0]
+        item_counts = np.diff(matrix.indptr)
+        min_support_count = _to_min_count(min_support, n_transactions)
+        top_counts = list()
+        pair_counts = None
+        pair_positions = np.full(len(item_counts), -1, dtype=np.int64)
+        if top_k is not None:
+            seed_counts = [item_counts]
+            if max_len is None or max_len > 1:
+                n_seeded = min(len(item_counts), int(np.sqrt(self.__COUNTING_BUDGET / 4)))
+                seeded_items = np.argsort(-item_counts, kind="stable")[:n_seeded]
+                pair_positions[seeded_items] = np.arange(len(seeded_items))
+                seeded_matrix = matrix[:, seeded_items].astype(np.int32)
+                pair_counts = (seeded_matrix.T @ seeded_matrix).toarray()
+                seed_counts.append(pair_counts[~np.tri(len(seeded_items), dtype=bool)])
+            seed_counts = np.concatenate(seed_counts).astype(np.int64)
+            if len(seed_counts) > top_k:
+                seed_counts = np.partition(seed_counts, len(seed_counts) - top_k)[-top_k:]
+            top_counts = seed_counts.tolist()
+            heapq.heapify(top_counts)
+
+        def min_count():
+            if top_k is None or len(top_counts) < top_k:
+                return min_support_count
+            return max(min_support_count, top_counts[0])
+
+        itemsets = list()
+        counts = list()
+
+        def add(itemset, count):
+            itemsets.append(itemset)
+            counts.append(count)
+            if top_k is None or len(itemset) < 2:
+                return
+            if len(itemset).__eq__(2) and (pair_positions[list(itemset)] >= 0).all():
+                return
+            if len(top_counts) < top_k:
+                heapq.heappush(top_counts, count)
+            elif count > top_counts[0]:
+                heapq.heapreplace(top_counts, count)
+
+        frequent_items = np.flatnonzero(item_counts >= min_count())
+        if top_k is None:
+            frequent_items = frequent_items[
+                np.argsort(item_counts[frequent_items], kind="stable")
+            ]
+        else:
+            frequent_items = frequent_items[
+                np.argsort(-item_counts[frequent_items], kind="stable")
+            ]
+        members = [
+            (item, matrix.indices[matrix.indptr[item]:matrix.indptr[item + 1]], item_counts[item])
+            for item in frequent_items
+        ]
+        self.__extend_eclat(
+            tuple(), members, max_len, use_diffsets, min_count, add, pair_counts, pair_positions
+        )
+        counts = np.array(counts, dtype=np.int64)
+        is_kept = counts >= min_count()
+        columns = df.columns
+        return pd.DataFrame(
+            {
+                self.__SUPPORT: counts[is_kept] / max(1, n_transactions),
+                self.__ITEMSETS: [
+                    frozenset(columns[list(itemset)])
+                    for itemset, kept in zip(itemsets, is_kept)
+                    if kept
+                ],
+            }
+        )
+
+    def __extend_eclat(
+        self, prefix, members, max_len, use_diffsets, min_count, add, pair_counts, pair_positions
+    ):
+        """
+        Add the itemsets of the prefix and each of the members, and extend them with the following members.
+        The members of the first level have transaction ids, and those below have diffsets with use_diffsets.
+        The members whose counts fall below min_count() are skipped, and so are the extensions by an item whose pair
+        count with the member is known from pair_counts to be below it.
+        """
+        member_items = np.array([member[0] for member in members], dtype=np.int64)
+        member_counts = np.array([member[2] for member in members], dtype=np.int64)
+        for position, (item, ids, count) in enumerate(members):
+            bar = min_count()
+            if count < bar:
+                continue
+            itemset = prefix + (item,)
+            add(itemset, count)
+            if max_len is not None and len(itemset) >= max_len:
+                continue
+            others = np.arange(position + 1, len(members))
+            others = others[member_counts[others] >= bar]
+            if pair_counts is not None and pair_positions[item] >= 0:
+                other_positions = pair_positions[member_items[others]]
+                bounds = pair_counts[pair_positions[item], np.maximum(other_positions, 0)]
+                others = others[(other_positions < 0) | (bounds >= bar)]
+            extended_members = list()
+            for other in others.tolist():
+                other_item, other_ids, _ = members[other]
+                if not use_diffsets:
+                    extended_ids = np.intersect1d(ids, other_ids, assume_unique=True)
+                    extended_count = len(extended_ids)
+                elif len(prefix).__eq__(0):
+                    extended_ids = np.setdiff1d(ids, other_ids, assume_unique=True)
+                    extended_count = count - len(extended_ids)
+                else:
+                    extended_ids = np.setdiff1d(other_ids, ids, assume_unique=True)
+                    extended_count = count - len(extended_ids)
+                if extended_count >= bar:
+                    extended_members.append((other_item, extended_ids, extended_count))
+            if len(extended_members) > 0:
+                self.__extend_eclat(
+                    itemset,
+                    extended_members,
+                    max_len,
+                    use_diffsets,
+                    min_count,
+                    add,
+                    pair_counts,
+                    pair_positions,
+                )
+
+    def __mine_by_level(
+        self, columns, n_transactions, counts, min_support, max_len, count_candidates
+    ):
+        """
+        Mine frequent itemsets level by level from the transaction counts of the items.
+        The candidates of a level are generated as mlxtend does, and counted by count_candidates.
+        """
+        is_frequent = counts / max(1, n_transactions) >= min_support
+        itemsets_by_length = [np.flatnonzero(is_frequent).reshape(-1, 1)]
+        counts_by_length = [counts[is_frequent]]
+        while max_len is None or len(itemsets_by_length) < max_len:
+            candidates = np.fromiter(
+                generate_new_combinations(itemsets_by_length[-1]), dtype=np.int64
+            ).reshape(-1, len(itemsets_by_length) + 1)
+            if len(candidates).__eq__(0):
+                break
+            candidate_counts = count_candidates(candidates)
+            is_frequent = candidate_counts / n_transactions >= min_support
+            if not is_frequent.any():
+                break
+            itemsets_by_length.append(candidates[is_frequent])
+            counts_by_length.append(candidate_counts[is_frequent])
+        return pd.DataFrame(
+            {
+                self.__SUPPORT: np.concatenate(counts_by_length) / max(1, n_transactions),
+                self.__ITEMSETS: [
+                    frozenset(columns[itemset])
+                    for itemsets in itemsets_by_length
+                    for itemset in itemsets
+                ],
+            }
+        )
+
+    def __mine_partitioned(self, df, n_jobs, options):
+        """
+        Mine frequent itemsets with the SON algorithm.
+        Each partition is mined on its own, and the union of the locally frequent itemsets is counted in every
+        partition. The matrix is shared with the processes instead of being pickled to them, or without shared
+        memory (Python 3.7), each process is sent the transactions of its partition.
+        """
+        if self.__is_sparse(df):
+            matrix = df.sparse.to_coo().tocsr()
+        else:
+            matrix = df.to_numpy(dtype=bool)
+        n_transactions = matrix.shape[0]
+        bounds = np.unique(np.linspace(0, n_transactions, n_jobs + 1).astype(np.int64))
+        if shared_memory is None:
+            specs = [matrix[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+            blocks = list()
+        else:
+            spec, blocks = _share_matrix(matrix)
+            specs = [spec] * (len(bounds) - 1)
+        try:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                candidates = set()
+                for itemsets in executor.map(
+                    _mine_partition,
+                    specs,
+                    bounds[:-1],
+                    bounds[1:],
+                    [options] * (len(bounds) - 1),
+                ):
+                    candidates.update(itemsets)
+                candidates = sorted(candidates, key=lambda itemset: (len(itemset), itemset))
+                lengths = np.array([len(itemset) for itemset in candidates], dtype=np.int64)
+                candidates_by_length = [
+                    np.array(
+                        [candidates[position] for position in np.flatnonzero(lengths == length)],
+                        dtype=np.int64,
+                    )
+                    for length in np.unique(lengths)
+                ]
+                counts = np.zeros(len(candidates), dtype=np.int64)
+                for partition_counts in executor.map(
+                    _count_partition,
+                    specs,
+                    bounds[:-1],
+                    bounds[1:],
+                    [candidates_by_length] * (len(bounds) - 1),
+                    [self.__COUNTING_BUDGET] * (len(bounds) - 1),
+                ):
+                    counts += partition_counts
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+        is_frequent = counts / n_transactions >= options["min_support"]
+        columns = df.columns
+        return pd.DataFrame(
+            {
+                self.__SUPPORT: counts[is_frequent] / n_transactions,
+                self.__ITEMSETS: [
+                    frozenset(columns[list(itemset)])
+                    for itemset, frequent in zip(candidates, is_frequent)
+                    if frequent
+                ],
+            }
+        )
+
+    def __to_matrix(self, df):
+        """
+        Convert the dataset to a boolean matrix of transactions by items, a CSC matrix if the dataset is sparse.
+        """
+        if self.__is_sparse(df):
+            return df.sparse.to_coo().tocsc()
+        return df.to_numpy(dtype=bool)
+
+    @staticmethod
+    def __is_sparse(df):
+        """
+        Returns whether the dataset has sparse columns. A dataset without columns is dense.
+        """
+        return len(df.columns) > 0 and all(
+            isinstance(dtype, pd.SparseDtype) for dtype in df.dtypes
         )
-        self.__df = frequent_items_df.sort_values(
-            self.__SUPPORT, ascending=False
-        ).reset_index(drop=True)
+
+    def __count_itemsets(self, df, itemsets):
+        """
+        Count the transactions of the dataset that contain each of the itemsets, on the bitsets of their items.
+        Itemsets with an item that the dataset does not have are counted as zero.
+        """
+        counts = np.zeros(len(itemsets), dtype=np.int64)
+        if len(itemsets).__eq__(0) or len(df).__eq__(0):
+            return counts
+        columns = [df.columns.get_indexer(list(itemset)) for itemset in itemsets]
+        items = np.unique(np.concatenate(columns))
+        items = items[items >= 0]
+        bitsets = _pack_bitsets(self.__to_matrix(df)[:, items])
+        lengths = np.array([len(itemset) for itemset in itemsets])
+        for length in np.unique(lengths):
+            positions = np.flatnonzero(lengths == length)
+            candidates = np.array([columns[position] for position in positions])
+            is_known = (candidates >= 0).all(axis=1)
+            counts[positions[is_known]] = _count_bitsets(
+                bitsets,
+                np.searchsorted(items, candidates[is_known]),
+                self.__COUNTING_BUDGET,
+            )
+        return counts
+
+    def __reset_peak_rss(self):
+        """
+        Reset the peak resident set size of the process where possible.
+        Returns whether it was reset, and else the peak resident set size so far.
+        """
+        try:
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5")
+            return True, None
+        except OSError:
+            return False, self.__get_max_rss()
+
+    def __measure_peak_rss(self, is_reset, start_peak_rss):
+        """
+        Measure the peak resident set size of the process in bytes since __reset_peak_rss.
+        """
+        if is_reset:
+            try:
+                with open("/proc/self/status") as f:
+                    for line in f:
+                        if line.startswith("VmHWM:"):
+                            return int(line.split()[1]) * 1024
+            except OSError:
+                pass
+            return None
+        peak_rss = self.__get_max_rss()
+        if peak_rss is None or start_peak_rss is None or peak_rss <= start_peak_rss:
+            return None
+        return peak_rss
+
+    def __get_max_rss(self):
+        """
+        Get the peak resident set size of the process in bytes since it started.
+        """
+        if resource is None:
+            return None
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform.__eq__("darwin"):
+            return peak_rss
+        return peak_rss * 1024
+
+
+class _Partition:
+    """
+    _Partition contains a range of the transactions of a dataset, in the format of Dataset.
+    """
+    __df = pd.DataFrame()
+
+    def __init__(self, df):
+        self.__df = df
 
     def to_frame(self):
         """
         Returns pandas.DataFrame.
         """
         return self.__df
+
+
+def _count_candidates(matrix, candidates, budget):
+    """
+    Count the transactions that contain each of the candidates of the same length.
+    The candidates are counted in chunks so that the boolean matrix of transactions by candidates fits in the budget.
+    """
+    counts = np.zeros(len(candidates), dtype=np.int64)
+    if len(candidates).__eq__(0):
+        return counts
+    if not isinstance(matrix, np.ndarray):
+        matrix = matrix.tocsc()
+    chunk_size = max(1, budget // max(1, matrix.shape[0] * candidates.shape[1]))
+    for start in range(0, len(candidates), chunk_size):
+        chunk = candidates[start:start + chunk_size]
+        if isinstance(matrix, np.ndarray):
+            counts[start:start + chunk_size] = np.all(matrix[:, chunk], axis=2).sum(axis=0)
+            continue
+        contains = matrix[:, chunk[:, 0]]
+        for position in range(1, chunk.shape[1]):
+            contains = contains.multiply(matrix[:, chunk[:, position]])
+        counts[start:start + chunk_size] = np.asarray(contains.sum(axis=0)).ravel()
+    return counts
+
+
+def _to_sample_size(matrix, epsilon, delta):
+    """
+    Returns the number of the transactions to sample with replacement, so that the supports of all the itemsets in
+    the sample are within epsilon of those in the matrix with probability at least 1 - delta (Riondato and Upfal).
+    The VC-dimension of the itemsets is bounded by the largest d such that d transactions have at least d items.
+    """
+    lengths = -np.sort(-np.asarray(matrix.sum(axis=1)).ravel())
+    d = np.count_nonzero(lengths >= np.arange(1, len(lengths) + 1))
+    return int(math.ceil(0.5 / epsilon ** 2 * (d + math.log(1 / delta))))
+
+
+_POPCOUNTS = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+def _to_min_count(min_support, n_transactions):
+    """
+    Returns the least transaction count whose support is at least min_support.
+    """
+    min_count = int(np.ceil(min_support * n_transactions))
+    while min_count > 0 and (min_count - 1) / max(1, n_transactions) >= min_support:
+        min_count -= 1
+    while min_count / max(1, n_transactions) < min_support:
+        min_count += 1
+    return min_count
+
+
+def _pack_bitsets(matrix):
+    """
+    Pack the transactions of each item into the bits of uint64 words, and returns the items by words matrix.
+    """
+    n_transactions, n_items = matrix.shape
+    n_words = max(1, -(-n_transactions // 64))
+    if isinstance(matrix, np.ndarray):
+        packed = np.zeros((n_items, n_words * 8), dtype=np.uint8)
+        packed[:, : -(-n_transactions // 8)] = np.packbits(matrix, axis=0).T
+        return packed.view(np.uint64)
+    matrix = matrix.tocsc()
+    bitsets = np.zeros(n_items * n_words, dtype=np.uint64)
+    transactions = matrix.indices.astype(np.uint64)
+    items = np.repeat(np.arange(n_items), np.diff(matrix.indptr))
+    np.bitwise_or.at(
+        bitsets,
+        items * n_words + (transactions >> np.uint64(6)).astype(np.int64),
+        np.left_shift(np.uint64(1), transactions & np.uint64(63)),
+    )
+    return bitsets.reshape(n_items, n_words)
+
+
+def _popcount(bitsets):
+    """
+    Count the bits set in each row of the bitsets.
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bitsets).sum(axis=-1, dtype=np.int64)
+    return _POPCOUNTS[bitsets.view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+
+def _count_bitsets(bitsets, candidates, budget):
+    """
+    Count the transactions that contain each of the candidates of the same length on the bitsets of the items.
+    The candidates are counted in chunks so that the bitsets of a chunk fit in the budget.
+    """
+    counts = np.zeros(len(candidates), dtype=np.int64)
+    chunk_size = max(1, budget // max(1, bitsets.shape[1] * 8 * 2))
+    for start in range(0, len(candidates), chunk_size):
+        chunk = candidates[start:start + chunk_size]
+        contains = bitsets[chunk[:, 0]]
+        for position in range(1, chunk.shape[1]):
+            np.bitwise_and(contains, bitsets[chunk[:, position]], out=contains)
+        counts[start:start + chunk_size] = _popcount(contains)
+    return counts
+
+
+def _share_matrix(matrix):
+    """
+    Copy the matrix to shared memory, and returns its spec and the shared memory blocks.
+    A sparse matrix is shared as the three arrays of CSR.
+    """
+    if isinstance(matrix, np.ndarray):
+        arrays = [matrix]
+    else:
+        arrays = [matrix.data, matrix.indices, matrix.indptr]
+    blocks = list()
+    array_specs = list()
+    for array in arrays:
+        block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        array_specs.append((block.name, array.shape, array.dtype.str))
+    return (isinstance(matrix, np.ndarray), matrix.shape, array_specs), blocks
+
+
+def _attach_matrix(spec, start, stop):
+    """
+    Attach the shared matrix, and returns the view of the transactions from start to stop and the shared memory blocks.
+    A spec that is a matrix is the partition itself, sent without shared memory, and is returned as it is.
+    """
+    if not isinstance(spec, tuple):
+        return spec, list()
+    is_dense, shape, array_specs = spec
+    blocks = list()
+    arrays = list()
+    for name, array_shape, dtype in array_specs:
+        block = shared_memory.SharedMemory(name=name)
+        blocks.append(block)
+        arrays.append(np.ndarray(array_shape, dtype=np.dtype(dtype), buffer=block.buf))
+    if is_dense:
+        return arrays[0][start:stop], blocks
+    data, indices, indptr = arrays
+    matrix = sparse.csr_matrix(
+        (
+            data[indptr[start]:indptr[stop]],
+            indices[indptr[start]:indptr[stop]],
+            indptr[start:stop + 1] - indptr[start],
+        ),
+        shape=(stop - start, shape[1]),
+    )
+    return matrix, blocks
+
+
+def _detach_matrix(blocks):
+    """
+    Detach the shared memory blocks.
+    Views that are still referenced keep their block mapped until the process exits.
+    """
+    gc.collect()
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError:
+            pass
+
+
+def _mine_partition(spec, start, stop, options):
+    """
+    Mine the locally frequent itemsets of a partition, as tuples of column positions.
+    """
+    matrix, blocks = _attach_matrix(spec, start, stop)
+    try:
+        if isinstance(matrix, np.ndarray):
+            df = pd.DataFrame(matrix)
+        else:
+            df = pd.DataFrame.sparse.from_spmatrix(matrix)
+        frequent_itemsets = FrequentItemsets(_Partition(df), **options)
+        return [
+            tuple(sorted(itemset)) for itemset in frequent_itemsets.to_frame()["itemsets"]
+        ]
+    finally:
+        del matrix
+        _detach_matrix(blocks)
+
+
+def _count_partition(spec, start, stop, candidates_by_length, budget):
+    """
+    Count the transactions of a partition that contain each of the candidates, concatenated in order of length.
+    """
+    matrix, blocks = _attach_matrix(spec, start, stop)
+    try:
+        return np.concatenate(
+            [np.zeros(0, dtype=np.int64)]
+            + [
+                _count_candidates(matrix, candidates, budget)
+                for candidates in candidates_by_length
+            ]
+        )
+    finally:
+        del matrix
+        _detach_matrix(blocks)
@@ -0,0 +1,174 @@
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+
+class Profiler:
+    """
+    Profiler records the stages of the pipeline that run while it is entered as a context manager: Dataset,
+    FrequentItemsets, AssociationRules and Recommender construction, recommend() and recommend_batch(), and their
+    steps, whose stage names are prefixed with the name of the method.
+    Each record has the wall time in seconds, the input and output row counts, the itemset counts per length of
+    FrequentItemsets and, with trace_memory, the peak memory traced by tracemalloc above that at the start in bytes.
+    Before Python 3.9, tracemalloc cannot reset its peak, so peak_bytes is None for the steps of a stage, and for a
+    stage when the peak traced before it is not exceeded.
+    callback is called with each record as dict at the end of the stage, and to_frame() returns all of them.
+    Stages run by any thread are recorded while the profiler is entered.
+    """
+    __COLUMNS = [
+        "stage",
+        "seconds",
+        "input_rows",
+        "output_rows",
+        "itemsets_by_length",
+        "peak_bytes",
+    ]
+
+    def __init__(self, callback=None, trace_memory=False):
+        self.__callback = callback
+        self.__trace_memory = trace_memory
+        self.__records = list()
+        self.__lock = threading.Lock()
+        self.__starts_tracing = False
+
+    def __enter__(self):
+        if self.__trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__starts_tracing = True
+        with _profilers_lock:
+            _profilers.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        with _profilers_lock:
+            _profilers.remove(self)
+        if self.__starts_tracing:
+            tracemalloc.stop()
+            self.__starts_tracing = False
+        return False
+
+    def records(self):
+        """
+        Returns the records as list of dict, in the order that the stages ended.
+        """
+        with self.__lock:
+            return [dict(record) for record in self.__records]
+
+    def to_frame(self):
+        """
+        Returns pandas.DataFrame.
+        """
+        return pd.DataFrame(self.records(), columns=self.__COLUMNS)
+
+    def _add_record(self, record):
+        """
+        Add the record of a stage that ended, and call the callback with it.
+        """
+        with self.__lock:
+            self.__records.append(record)
+        if self.__callback is not None:
+            self.__callback(dict(record))
+
+
+class _Stage:
+    """
+    _Stage measures a stage for the entered profilers. Set output_rows and itemsets_by_length before it ends.
+    The stages open in a thread are stacked, so that the peak memory of a stage includes those of its steps.
+    """
+
+    def __init__(self, name, input_rows, profilers):
+        self.name = name
+        self.input_rows = input_rows
+        self.output_rows = None
+        self.itemsets_by_length = None
+        self.__profilers = profilers
+        self.__started_at = None
+        self.__start_bytes = None
+        self.__start_peak_bytes = None
+        self.peak_bytes = 0
+
+    def __enter__(self):
+        stack = _get_stack()
+        if tracemalloc.is_tracing():
+            current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            if len(stack) > 0:
+                stack[-1].peak_bytes = max(stack[-1].peak_bytes, peak_bytes)
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+                self.__start_bytes = current_bytes
+            elif len(stack).__eq__(0):
+                self.__start_bytes = current_bytes
+                self.__start_peak_bytes = peak_bytes
+        stack.append(self)
+        self.__started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self.__started_at
+        stack = _get_stack()
+        stack.remove(self)
+        peak_bytes = None
+        if self.__start_bytes is not None and tracemalloc.is_tracing():
+            peak_bytes = max(self.peak_bytes, tracemalloc.get_traced_memory()[1])
+            if len(stack) > 0:
+                stack[-1].peak_bytes = max(stack[-1].peak_bytes, peak_bytes)
+            if (self.__start_peak_bytes is not None and self.__start_peak_bytes > self.__start_bytes
+                    and peak_bytes <= self.__start_peak_bytes):
+                peak_bytes = None
+            else:
+                peak_bytes = max(0, peak_bytes - self.__start_bytes)
+        if exc_type is not None:
+            return False
+        record = {
+            "stage": self.name,
+            "seconds": seconds,
+            "input_rows": self.input_rows,
+            "output_rows": self.output_rows,
+            "itemsets_by_length": self.itemsets_by_length,
+            "peak_bytes": peak_bytes,
+        }
+        for profiler in self.__profilers:
+            profiler._add_record(record)
+        return False
+
+
+class _NullStage:
+    """
+    _NullStage stands in for _Stage while no profiler is entered, and measures nothing.
+    """
+    input_rows = None
+    output_rows = None
+    itemsets_by_length = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_profilers = list()
+_profilers_lock = threading.Lock()
+_local = threading.local()
+
+
+def _get_stack():
+    """
+    Returns the stages open in this thread.
+    """
+    if not hasattr(_local, "stack"):
+        _local.stack = list()
+    return _local.stack
+
+
+def _stage(name, input_rows=None):
+    """
+    Returns a context manager that measures the stage for the entered profilers, or does nothing if there are none.
+    """
+    if len(_profilers).__eq__(0):
+        return _NullStage()
+    with _profilers_lock:
+        profilers = list(_profilers)
+    return _Stage(name, input_rows, profilers)
@@ -1,14 +1,25 @@
-import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
 
 import numpy as np
 import pandas as pd
-from df4loop import DFIterator
+from scipy import sparse
+
+from autoarm.profiler import _stage
 
 
 class Recommender:
     """
     Recommender contains association rules for recommended use.
+    The rules are ranked for confidence and lift in advance.
+    The ranks for other sort_by_columns are made on first use, and up to max_sort_orders of them are kept.
+    With cache_size > 0, up to cache_size results of recommend() are kept, each for cache_ttl seconds if it is given.
+    save() writes the rules as .npy arrays, which load() can memory-map so that processes share them.
     """
+    __BASKET_ID = "basket_id"
     __RANK = "rank"
     __ANTECEDENTS = "antecedents"
     __CONSEQUENTS = "consequents"
@@ -24,7 +35,13 @@ class Recommender:
         __CONFIDENCE,
         __LIFT,
     ]
-    __SORT_BY_ANTECEDENTS_CONSEQUENTS = [__ANTECEDENTS, __CONSEQUENTS]
+    __COLUMNS_WITH_BASKET_ID_AND_RANK = [__BASKET_ID] + __COLUMNS_WITH_RANK
+    __ANTECEDENTS_ORDER = "antecedents_order"
+    __CONSEQUENTS_ORDER = "consequents_order"
+    __RULE_ID = "rule_id"
+    __RULE_RANK = "rule_rank"
+    __ANTECEDENT_ID = "antecedent_id"
+    __CONSEQUENT_ID = "consequent_id"
     __SORT_BY_CONFIDENCE_SUPPORT_LIFT = [__CONFIDENCE, __SUPPORT, __LIFT]
     __SORT_BY_LIFT_SUPPORT_CONFIDENCE = [__LIFT, __SUPPORT, __CONFIDENCE]
     __DEFAULT_SORT_BY_COLUMNS = {
@@ -32,13 +49,37 @@ class Recommender:
         __LIFT: __SORT_BY_LIFT_SUPPORT_CONFIDENCE,
     }
     __DEFAULT_N = 1
-    __divided_rules = pd.DataFrame()
+    __DEFAULT_MAX_SORT_ORDERS = 8
+    __FORMAT_VERSION = 1
+    __META_FILE = "recommender.json"
+    __rules = None
+    __rules_by_item = sparse.csr_matrix((0, 0), dtype=np.int32)
+    __antecedent_sizes = np.empty(0, dtype=np.int64)
+    __ranks_by_metric = dict()
+    __ranks_by_sort_columns = OrderedDict()
+    __max_sort_orders = 8
+    __sort_orders_lock = None
+    __cache = OrderedDict()
+    __cache_size = 0
+    __cache_ttl = None
+    __cache_lock = None
+    __cache_hits = 0
+    __cache_misses = 0
+    __cache_evictions = 0
     __n = 1
     __metric = "confidence"
     __allow_from_items = False
 
-    def __init__(self, association_rules, n=None, metric=None, allow_from_items=False):
-        self.__divided_rules = self.__divide_consequents(association_rules.to_frame())
+    def __init__(
+        self,
+        association_rules,
+        n=None,
+        metric=None,
+        allow_from_items=False,
+        max_sort_orders=None,
+        cache_size=0,
+        cache_ttl=None,
+    ):
         if n is None:
             n = self.__DEFAULT_N
         if n < 1:
@@ -47,17 +88,53 @@ class Recommender:
             metric = self.__CONFIDENCE
         if metric not in [self.__CONFIDENCE, self.__LIFT]:
             raise ValueError()
+        if max_sort_orders is None:
+            max_sort_orders = self.__DEFAULT_MAX_SORT_ORDERS
+        if max_sort_orders < 0:
+            raise ValueError()
+        if cache_size < 0:
+            raise ValueError()
+        if cache_ttl is not None and cache_ttl <= 0:
+            raise ValueError()
+        rules_df = association_rules.to_frame()
+        with _stage("Recommender.__init__", len(rules_df)) as stage:
+            with _stage("Recommender.__init__.divide_consequents", len(rules_df)) as step:
+                self.__rules = self.__divide_consequents(rules_df)
+                step.output_rows = len(self.__rules)
+            with _stage("Recommender.__init__.index_items", len(self.__rules)) as step:
+                self.__rules_by_item, self.__antecedent_sizes = self.__index_items(
+                    self.__rules
+                )
+                step.output_rows = self.__rules_by_item.shape[0]
+            with _stage("Recommender.__init__.rank", len(self.__rules)) as step:
+                self.__ranks_by_metric = {
+                    metric: self.__rank_rules(
+                        np.arange(len(self.__rules)), sort_by_columns
+                    )
+                    for metric, sort_by_columns in self.__DEFAULT_SORT_BY_COLUMNS.items()
+                }
+                step.output_rows = len(self.__rules)
+            stage.output_rows = len(self.__rules)
         self.__n = n
         self.__metric = metric
         self.__allow_from_items = allow_from_items
+        self.__ranks_by_sort_columns = OrderedDict()
+        self.__max_sort_orders = max_sort_orders
+        self.__sort_orders_lock = threading.Lock()
+        self.__cache = OrderedDict()
+        self.__cache_size = cache_size
+        self.__cache_ttl = cache_ttl
+        self.__cache_lock = threading.Lock()
 
     def recommend(
         self, items, n=None, metric=None, allow_from_items=None, sort_by_columns=None
     ):
         """
         Returns association rules that are useful for recommendations.
+        A kept result is returned as a copy, so that changing it does not change the kept one.
         """
-        if len(frozenset(items)) < 1:
+        items = frozenset(items)
+        if len(items) < 1:
             raise ValueError()
         if n is None:
             n = self.__n
@@ -69,111 +146,637 @@ class Recommender:
             raise ValueError()
         if allow_from_items is None:
             allow_from_items = self.__allow_from_items
-        rules_df = self.__match_with_input_items(self.__divided_rules, frozenset(items))
-        if not allow_from_items:
-            rules_df = self.__exclude_input_items(rules_df, frozenset(items))
         if sort_by_columns is None:
             sort_by_columns = list()
-        if len(sort_by_columns).__eq__(0):
-            sort_by_columns = self.__DEFAULT_SORT_BY_COLUMNS[metric]
-        return self.__select_top_n_consequences(
-            rules_df, n, sort_by_columns=sort_by_columns
+        with _stage("Recommender.recommend", len(items)) as stage:
+            if self.__cache_size.__eq__(0):
+                recommend_rules = self.__recommend(
+                    items, n, metric, allow_from_items, sort_by_columns
+                )
+            else:
+                key = (items, n, metric, bool(allow_from_items), tuple(sort_by_columns))
+                recommend_rules = self.__get_cached(key)
+                if recommend_rules is None:
+                    recommend_rules = self.__recommend(
+                        items, n, metric, allow_from_items, sort_by_columns
+                    )
+                    self.__put_cached(key, recommend_rules)
+                recommend_rules = recommend_rules.copy()
+            stage.output_rows = len(recommend_rules)
+        return recommend_rules
+
+    def cache_info(self):
+        """
+        Returns the hits, misses, evictions and size of the cache of recommend() as dict.
+        """
+        with self.__cache_lock:
+            return {
+                "hits": self.__cache_hits,
+                "misses": self.__cache_misses,
+                "evictions": self.__cache_evictions,
+                "size": len(self.__cache),
+            }
+
+    def clear_cache(self):
+        """
+        Clear the cache of recommend() and its counters.
+        """
+        with self.__cache_lock:
+            self.__cache.clear()
+            self.__cache_hits = 0
+            self.__cache_misses = 0
+            self.__cache_evictions = 0
+
+    def recommend_batch(
+        self, baskets, n=None, metric=None, allow_from_items=None, sort_by_columns=None
+    ):
+        """
+        Returns association rules that are useful for recommendations for each of the baskets.
+        The rows of a basket are the same as recommend() returns for it, and basket_id is the position of the basket.
+        """
+        baskets = [frozenset(items) for items in baskets]
+        for items in baskets:
+            if len(items) < 1:
+                raise ValueError()
+        if n is None:
+            n = self.__n
+        if n < 1:
+            raise ValueError()
+        if metric is None:
+            metric = self.__metric
+        if metric not in [self.__CONFIDENCE, self.__LIFT]:
+            raise ValueError()
+        if allow_from_items is None:
+            allow_from_items = self.__allow_from_items
+        with _stage("Recommender.recommend_batch", len(baskets)) as stage:
+            with _stage("Recommender.recommend_batch.rank", len(self.__rules)) as step:
+                ranks = self.__get_ranks(metric, sort_by_columns)
+                step.output_rows = len(ranks)
+            with _stage("Recommender.recommend_batch.encode", len(baskets)) as step:
+                items_by_basket = self.__encode_baskets(baskets)
+                step.output_rows = items_by_basket.shape[0]
+            with _stage("Recommender.recommend_batch.match", len(baskets)) as step:
+                matches_df = self.__match_baskets_with_rules(items_by_basket)
+                step.output_rows = len(matches_df)
+            if not allow_from_items:
+                with _stage(
+                    "Recommender.recommend_batch.exclude", len(matches_df)
+                ) as step:
+                    matches_df = self.__exclude_basket_items(matches_df, items_by_basket)
+                    step.output_rows = len(matches_df)
+            with _stage("Recommender.recommend_batch.select", len(matches_df)) as step:
+                recommend_rules = self.__select_top_n_consequences_by_basket(
+                    matches_df, ranks, len(baskets), n
+                )
+                step.output_rows = len(recommend_rules)
+            stage.output_rows = len(recommend_rules)
+        return recommend_rules
+
+    def save(self, path):
+        """
+        Save the recommender to the directory of path, as .npy arrays and a JSON file of the options and the items.
+        The items must be strings or numbers, and nothing is written if they are not.
+        """
+        items = [
+            item.item() if isinstance(item, np.generic) else item
+            for item in self.__rules.items
+        ]
+        if not all(isinstance(item, (str, int, float)) for item in items):
+            raise ValueError()
+        os.makedirs(path, exist_ok=True)
+        metric_columns = list(self.__rules.metrics)
+        arrays = {
+            "antecedents_data": self.__rules.antecedents.data,
+            "antecedents_indices": self.__rules.antecedents.indices,
+            "antecedents_indptr": self.__rules.antecedents.indptr,
+            "antecedent_ids": self.__rules.antecedent_ids,
+            "consequent_ids": self.__rules.consequent_ids,
+            "rules_by_item_data": self.__rules_by_item.data,
+            "rules_by_item_indices": self.__rules_by_item.indices,
+            "rules_by_item_indptr": self.__rules_by_item.indptr,
+            "antecedent_sizes": self.__antecedent_sizes,
+        }
+        for i, column in enumerate(metric_columns):
+            arrays["metric_{}".format(i)] = self.__rules.metrics[column]
+        for metric, ranks in self.__ranks_by_metric.items():
+            arrays["ranks_{}".format(metric)] = ranks
+        for name, array in arrays.items():
+            np.save(
+                os.path.join(path, name + ".npy"),
+                np.ascontiguousarray(array),
+                allow_pickle=False,
+            )
+        meta = {
+            "format_version": self.__FORMAT_VERSION,
+            "items": items,
+            "metric_columns": metric_columns,
+            "n": self.__n,
+            "metric": self.__metric,
+            "allow_from_items": bool(self.__allow_from_items),
+            "max_sort_orders": self.__max_sort_orders,
+            "cache_size": self.__cache_size,
+            "cache_ttl": self.__cache_ttl,
+        }
+        with open(os.path.join(path, self.__META_FILE), "w") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Returns Recommender saved by save() to the directory of path.
+        With mmap=True, the arrays are memory-mapped read-only instead of read, so that they are read on demand
+        and shared through the page cache by the processes that load the same directory.
+        """
+        with open(os.path.join(path, cls.__META_FILE)) as f:
+            meta = json.load(f)
+        if meta["format_version"] != cls.__FORMAT_VERSION:
+            raise ValueError()
+        mmap_mode = "r" if mmap else None
+        recommender = cls.__new__(cls)
+        arrays = {
+            name: recommender.__load_array(path, name, mmap_mode)
+            for name in [
+                "antecedents_data",
+                "antecedents_indices",
+                "antecedents_indptr",
+                "antecedent_ids",
+                "consequent_ids",
+                "rules_by_item_data",
+                "rules_by_item_indices",
+                "rules_by_item_indptr",
+                "antecedent_sizes",
+            ]
+        }
+        items = pd.Index(meta["items"], dtype=object)
+        n_rules = len(arrays["consequent_ids"])
+        recommender.__rules = _RuleStore(
+            items=items,
+            antecedents=sparse.csr_matrix(
+                (
+                    arrays["antecedents_data"],
+                    arrays["antecedents_indices"],
+                    arrays["antecedents_indptr"],
+                ),
+                shape=(n_rules, len(items)),
+                copy=False,
+            ),
+            antecedent_ids=arrays["antecedent_ids"],
+            consequent_ids=arrays["consequent_ids"],
+            metrics={
+                column: recommender.__load_array(
+                    path, "metric_{}".format(i), mmap_mode
+                )
+                for i, column in enumerate(meta["metric_columns"])
+            },
+        )
+        recommender.__rules_by_item = sparse.csr_matrix(
+            (
+                arrays["rules_by_item_data"],
+                arrays["rules_by_item_indices"],
+                arrays["rules_by_item_indptr"],
+            ),
+            shape=(len(items), n_rules),
+            copy=False,
         )
+        recommender.__antecedent_sizes = arrays["antecedent_sizes"]
+        recommender.__ranks_by_metric = {
+            metric: recommender.__load_array(
+                path, "ranks_{}".format(metric), mmap_mode
+            )
+            for metric in cls.__DEFAULT_SORT_BY_COLUMNS
+        }
+        recommender.__ranks_by_sort_columns = OrderedDict()
+        recommender.__max_sort_orders = meta["max_sort_orders"]
+        recommender.__sort_orders_lock = threading.Lock()
+        recommender.__cache = OrderedDict()
+        recommender.__cache_size = meta["cache_size"]
+        recommender.__cache_ttl = meta["cache_ttl"]
+        recommender.__cache_lock = threading.Lock()
+        recommender.__n = meta["n"]
+        recommender.__metric = meta["metric"]
+        recommender.__allow_from_items = meta["allow_from_items"]
+        return recommender
+
+    def __load_array(self, path, name, mmap_mode):
+        """
+        Load the array of the name saved by save(). A memory-mapped array is returned as a plain view of the map.
+        """
+        return np.asarray(
+            np.load(
+                os.path.join(path, name + ".npy"), mmap_mode=mmap_mode, allow_pickle=False
+            )
+        )
+
+    def __recommend(self, items, n, metric, allow_from_items, sort_by_columns):
+        """
+        Recommend without the cache.
+        """
+        with _stage("Recommender.recommend.match", len(items)) as step:
+            rule_ids = self.__match_with_input_items(items)
+            step.output_rows = len(rule_ids)
+        if not allow_from_items:
+            with _stage("Recommender.recommend.exclude", len(rule_ids)) as step:
+                rule_ids = self.__exclude_input_items(rule_ids, items)
+                step.output_rows = len(rule_ids)
+        with _stage("Recommender.recommend.rank", len(rule_ids)) as step:
+            ranks = self.__get_ranks(metric, sort_by_columns)[rule_ids]
+            step.output_rows = len(ranks)
+        with _stage("Recommender.recommend.select", len(rule_ids)) as step:
+            recommend_rules = self.__select_top_n_consequences(rule_ids, ranks, n)
+            step.output_rows = len(recommend_rules)
+        return recommend_rules
+
+    def __get_cached(self, key):
+        """
+        Get the kept result of the key, or None. A result older than cache_ttl seconds is evicted.
+        """
+        with self.__cache_lock:
+            if key in self.__cache:
+                expires_at, recommend_rules = self.__cache[key]
+                if expires_at is None or time.monotonic() < expires_at:
+                    self.__cache.move_to_end(key)
+                    self.__cache_hits += 1
+                    return recommend_rules
+                del self.__cache[key]
+                self.__cache_evictions += 1
+            self.__cache_misses += 1
+            return None
+
+    def __put_cached(self, key, recommend_rules):
+        """
+        Keep the result of the key, evicting the least recently used results beyond cache_size.
+        """
+        expires_at = None
+        if self.__cache_ttl is not None:
+            expires_at = time.monotonic() + self.__cache_ttl
+        with self.__cache_lock:
+            self.__cache[key] = (expires_at, recommend_rules)
+            self.__cache.move_to_end(key)
+            while len(self.__cache) > self.__cache_size:
+                self.__cache.popitem(last=False)
+                self.__cache_evictions += 1
 
     def __divide_consequents(self, rules_df):
         """
-        Divide the consequents.
+        Divide the consequents, and store the rules as arrays.
+        The rules are repeated once per consequent, and the items of the rules are stored as ids.
         """
         if len(rules_df).__eq__(0):
-            return pd.DataFrame()
-        df_iterator = DFIterator(rules_df)
-        tmp_dist = dict()
-        for row in df_iterator.iterrows(return_indexes=False):
-            for consequent in row[self.__CONSEQUENTS]:
-                tmp_row = copy.deepcopy(row)
-                tmp_row[self.__CONSEQUENTS] = frozenset(consequent)
-                tmp_dist[len(tmp_dist)] = tmp_row
-        divided_rules_df = pd.DataFrame.from_dict(tmp_dist, orient="index")
-        if len(divided_rules_df).__eq__(0):
-            return pd.DataFrame()
-        divided_rules_df.columns = rules_df.columns
-        return divided_rules_df
-
-    def __match_with_input_items(self, rules_df, items):
-        """
-        Match rules with items.
+            return _RuleStore()
+        antecedents = rules_df[self.__ANTECEDENTS].tolist()
+        consequents = rules_df[self.__CONSEQUENTS].tolist()
+        antecedent_sizes = np.fromiter(
+            (len(antecedent) for antecedent in antecedents),
+            dtype=np.int64,
+            count=len(antecedents),
+        )
+        consequent_sizes = np.fromiter(
+            (len(consequent) for consequent in consequents),
+            dtype=np.int64,
+            count=len(consequents),
+        )
+        if consequent_sizes.sum().__eq__(0):
+            return _RuleStore()
+        antecedent_items = [item for antecedent in antecedents for item in antecedent]
+        consequent_items = [item for consequent in consequents for item in consequent]
+        codes, items = pd.factorize(
+            pd.Series(antecedent_items + consequent_items, dtype=object)
+        )
+        rule_ids = np.repeat(np.arange(len(consequents)), consequent_sizes)
+        rule_antecedents = sparse.csr_matrix(
+            (
+                np.ones(len(antecedent_items), dtype=bool),
+                codes[: len(antecedent_items)].astype(np.int32),
+                np.concatenate([[0], np.cumsum(antecedent_sizes)]),
+            ),
+            shape=(len(antecedents), len(items)),
+        )
+        return _RuleStore(
+            items=pd.Index(items, dtype=object),
+            antecedents=rule_antecedents[rule_ids],
+            antecedent_ids=pd.factorize(rules_df[self.__ANTECEDENTS])[0][rule_ids],
+            consequent_ids=codes[len(antecedent_items):].astype(np.int32),
+            metrics={
+                column: rules_df[column].to_numpy()[rule_ids]
+                for column in rules_df.columns
+                if column not in [self.__ANTECEDENTS, self.__CONSEQUENTS]
+            },
+        )
+
+    def __index_items(self, rules):
         """
-        if len(rules_df).__eq__(0):
-            return pd.DataFrame()
-        df_iterator = DFIterator(rules_df)
-        tmp_dist = dict()
-        for row in df_iterator.iterrows(return_indexes=False):
-            if frozenset(items).issuperset(row[self.__ANTECEDENTS]):
-                tmp_dist[len(tmp_dist)] = copy.deepcopy(row)
-        matched_rules_df = pd.DataFrame.from_dict(tmp_dist, orient="index")
-        if len(matched_rules_df).__eq__(0):
-            return pd.DataFrame()
-        matched_rules_df.columns = rules_df.columns
-        return matched_rules_df
-
-    def __exclude_input_items(self, rules_df, items):
+        Index the items of the rules.
+        The antecedents are indexed as a sparse item-by-rule matrix, so that the rules containing an item are a row of it.
         """
-        Exclude input items from recommendation candidates.
+        rules_by_item = rules.antecedents.T.tocsr().astype(np.int32)
+        return rules_by_item, np.diff(rules.antecedents.indptr).astype(np.int64)
+
+    def __get_ranks(self, metric, sort_by_columns=None):
         """
-        if len(rules_df).__eq__(0):
-            return pd.DataFrame()
-        df_iterator = DFIterator(rules_df)
-        tmp_dist = dict()
-        for row in df_iterator.iterrows(return_indexes=False):
-            if not frozenset(items).issuperset(row[self.__CONSEQUENTS]):
-                tmp_dist[len(tmp_dist)] = copy.deepcopy(row)
-        excluded_rules_df = pd.DataFrame.from_dict(tmp_dist, orient="index")
-        if len(excluded_rules_df).__eq__(0):
-            return pd.DataFrame()
-        excluded_rules_df.columns = rules_df.columns
-        return excluded_rules_df
-
-    def __select_top_n_consequences(self, rules_df, n=None, sort_by_columns=None):
-        """
-        Select top n consequences. Sort based on the specified metric.
+        Get the ranks of all the rules for the metric, or for the sort_by_columns if they are specified.
+        The ranks for the sort_by_columns are kept in least recently used order, up to max_sort_orders of them.
+        They are ranked outside of the lock, so threads that miss the same sort_by_columns at once may rank them twice.
         """
-        if len(rules_df).__eq__(0):
-            return self.__make_n_rows(rules_df, n)
-        rules_df = rules_df.sort_values(
-            by=self.__SORT_BY_ANTECEDENTS_CONSEQUENTS
-        ).reset_index(drop=True)
-        if n is None:
-            n = self.__DEFAULT_N
         if sort_by_columns is None:
             sort_by_columns = list()
-        if len(sort_by_columns) > 0:
-            tmp_list = list()
-            while len(sort_by_columns) > len(tmp_list):
-                tmp_list.append(False)
-            rules_df = rules_df.sort_values(
-                by=sort_by_columns, ascending=tmp_list
-            ).reset_index(drop=True)
-        df_iterator = DFIterator(rules_df)
-        already_selected_consequents = set()
-        tmp_dist = dict()
-        for row in df_iterator.iterrows(return_indexes=False):
-            if not already_selected_consequents.issuperset(row[self.__CONSEQUENTS]):
-                tmp_dist[len(tmp_dist)] = copy.deepcopy(row)
-                for consequent in row[self.__CONSEQUENTS]:
-                    already_selected_consequents.add(consequent)
-        tmp_df = pd.DataFrame.from_dict(tmp_dist, orient="index")
-        tmp_df.columns = rules_df.columns
-        tmp_df = self.__make_n_rows(tmp_df, n)
-        selected_rules_df = tmp_df.reset_index(drop=True)
-        selected_rules_df[self.__RANK] = range(1, n + 1)
-        return selected_rules_df[self.__COLUMNS_WITH_RANK]
-
-    def __make_n_rows(self, df, n):
-        """
-        Adjust the pandas.DataFrame to n rows. The value of the added rows are NaN.
-        """
-        while len(df) < n:
-            df = df.append([np.nan])
-        while len(df) > n:
-            df = df[:-1]
-        return df
+        if len(sort_by_columns).__eq__(0):
+            return self.__ranks_by_metric[metric]
+        sort_by_columns = tuple(sort_by_columns)
+        for default_metric, default_columns in self.__DEFAULT_SORT_BY_COLUMNS.items():
+            if sort_by_columns.__eq__(tuple(default_columns)):
+                return self.__ranks_by_metric[default_metric]
+        with self.__sort_orders_lock:
+            if sort_by_columns in self.__ranks_by_sort_columns:
+                self.__ranks_by_sort_columns.move_to_end(sort_by_columns)
+                return self.__ranks_by_sort_columns[sort_by_columns]
+        ranks = self.__rank_rules(np.arange(len(self.__rules)), sort_by_columns)
+        if self.__max_sort_orders > 0:
+            with self.__sort_orders_lock:
+                self.__ranks_by_sort_columns[sort_by_columns] = ranks
+                self.__ranks_by_sort_columns.move_to_end(sort_by_columns)
+                while len(self.__ranks_by_sort_columns) > self.__max_sort_orders:
+                    self.__ranks_by_sort_columns.popitem(last=False)
+        return ranks
+
+    def __rank_rules(self, rule_ids, sort_by_columns):
+        """
+        Rank the rules in descending order of the columns. The rules that tie on all of the columns share a rank.
+        """
+        if len(rule_ids).__eq__(0):
+            return np.empty(0, dtype=np.int64)
+        keys = list()
+        for column in reversed(list(sort_by_columns)):
+            codes, uniques = pd.factorize(
+                self.__rules.metrics[column][rule_ids], sort=True
+            )
+            codes[codes < 0] = len(uniques)
+            keys.append(np.where(codes < len(uniques), len(uniques) - 1 - codes, codes))
+        order = np.lexsort(keys)
+        is_tied = np.ones(len(order) - 1, dtype=bool)
+        for key in keys:
+            is_tied &= key[order][1:] == key[order][:-1]
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[order] = np.concatenate([[0], np.cumsum(~is_tied)])
+        return ranks
+
+    def __match_with_input_items(self, items):
+        """
+        Match rules with items, and returns the ids of the matched rules.
+        Only the rules indexed under the items are examined, and a rule matches when all of its antecedents are hit.
+        """
+        item_ids = self.__rules.items.get_indexer(list(items))
+        item_ids = item_ids[item_ids >= 0]
+        if len(item_ids).__eq__(0):
+            return np.empty(0, dtype=np.int64)
+        indptr = self.__rules_by_item.indptr
+        indices = self.__rules_by_item.indices
+        candidates = np.concatenate(
+            [indices[indptr[item_id]:indptr[item_id + 1]] for item_id in item_ids]
+        )
+        rule_ids, hits = np.unique(candidates, return_counts=True)
+        return rule_ids[hits == self.__antecedent_sizes[rule_ids]].astype(np.int64)
+
+    def __exclude_input_items(self, rule_ids, items):
+        """
+        Exclude input items from recommendation candidates.
+        """
+        item_ids = self.__rules.items.get_indexer(list(items))
+        return rule_ids[~np.isin(self.__rules.consequent_ids[rule_ids], item_ids)]
+
+    def __select_top_n_consequences(self, rule_ids, ranks, n):
+        """
+        Select top n consequences. The rules are ranked based on the specified metric.
+        Only the best ranked rules are sorted, doubling them until they have n distinct consequents.
+        The rules that tie are ordered by the first appearance of their antecedents, then of their consequents.
+        """
+        if len(rule_ids).__eq__(0):
+            return self.__make_n_rows(rule_ids, n)
+        antecedent_orders = pd.factorize(self.__rules.antecedent_ids[rule_ids])[0]
+        consequent_ids = self.__rules.consequent_ids[rule_ids]
+        consequent_orders = pd.factorize(consequent_ids)[0]
+        n_candidates = min(2 * n, len(rule_ids))
+        while True:
+            if n_candidates < len(rule_ids):
+                threshold = ranks[
+                    np.argpartition(ranks, n_candidates - 1)[n_candidates - 1]
+                ]
+                candidates = np.flatnonzero(ranks <= threshold)
+            else:
+                candidates = np.arange(len(rule_ids))
+            candidates = candidates[
+                np.lexsort(
+                    (
+                        consequent_orders[candidates],
+                        antecedent_orders[candidates],
+                        ranks[candidates],
+                    )
+                )
+            ]
+            _, first_positions = np.unique(
+                consequent_ids[candidates], return_index=True
+            )
+            if len(first_positions) >= n or len(candidates).__eq__(len(rule_ids)):
+                break
+            n_candidates = min(2 * len(candidates), len(rule_ids))
+        selected_rule_ids = rule_ids[candidates[np.sort(first_positions)[:n]]]
+        return self.__make_n_rows(selected_rule_ids, n)
+
+    def __encode_baskets(self, baskets):
+        """
+        Encode the baskets as a sparse basket-by-item matrix.
+        Items that do not appear in any rule are left out.
+        """
+        basket_sizes = np.fromiter(
+            (len(items) for items in baskets), dtype=np.int64, count=len(baskets)
+        )
+        basket_ids = np.repeat(np.arange(len(baskets)), basket_sizes)
+        item_ids = self.__rules.items.get_indexer(
+            pd.Series([item for items in baskets for item in items], dtype=object)
+        )
+        is_known = item_ids >= 0
+        return sparse.csr_matrix(
+            (
+                np.ones(is_known.sum(), dtype=np.int32),
+                (basket_ids[is_known], item_ids[is_known]),
+            ),
+            shape=(len(baskets), len(self.__rules.items)),
+        )
+
+    def __match_baskets_with_rules(self, items_by_basket):
+        """
+        Match rules with each of the baskets.
+        The basket-by-rule product counts the hit antecedents, and a rule matches when all of them are hit.
+        """
+        if len(self.__rules).__eq__(0):
+            return pd.DataFrame(
+                {
+                    self.__BASKET_ID: np.empty(0, dtype=np.int64),
+                    self.__RULE_ID: np.empty(0, dtype=np.int64),
+                }
+            )
+        hits = (items_by_basket @ self.__rules_by_item).tocoo()
+        is_matched = hits.data == self.__antecedent_sizes[hits.col]
+        basket_ids = hits.row[is_matched].astype(np.int64)
+        rule_ids = hits.col[is_matched].astype(np.int64)
+        order = np.lexsort((rule_ids, basket_ids))
+        return pd.DataFrame(
+            {self.__BASKET_ID: basket_ids[order], self.__RULE_ID: rule_ids[order]}
+        )
+
+    def __exclude_basket_items(self, matches_df, items_by_basket):
+        """
+        Exclude the items of each basket from its recommendation candidates.
+        """
+        if len(matches_df).__eq__(0):
+            return matches_df
+        basket_ids = matches_df[self.__BASKET_ID].to_numpy()
+        consequent_ids = self.__rules.consequent_ids[matches_df[self.__RULE_ID].to_numpy()]
+        is_in_basket = np.asarray(items_by_basket[basket_ids, consequent_ids]).ravel() > 0
+        return matches_df[~is_in_basket].reset_index(drop=True)
+
+    def __select_top_n_consequences_by_basket(self, matches_df, ranks, n_baskets, n):
+        """
+        Select top n consequences for each of the baskets. The rules are ranked based on the specified metric.
+        """
+        if len(matches_df).__eq__(0):
+            return self.__make_n_rows_by_basket(
+                matches_df, np.empty(0, dtype=np.int64), n_baskets, n
+            )
+        rule_ids = matches_df[self.__RULE_ID].to_numpy()
+        tmp_df = matches_df.copy()
+        tmp_df[self.__RULE_RANK] = ranks[rule_ids]
+        tmp_df[self.__ANTECEDENT_ID] = self.__rules.antecedent_ids[rule_ids]
+        tmp_df[self.__CONSEQUENT_ID] = self.__rules.consequent_ids[rule_ids]
+        tmp_df[self.__ANTECEDENTS_ORDER] = tmp_df.groupby(
+            [self.__BASKET_ID, self.__ANTECEDENT_ID]
+        )[self.__RULE_ID].transform("min")
+        tmp_df[self.__CONSEQUENTS_ORDER] = tmp_df.groupby(
+            [self.__BASKET_ID, self.__CONSEQUENT_ID]
+        )[self.__RULE_ID].transform("min")
+        tmp_df = tmp_df.sort_values(
+            by=[
+                self.__BASKET_ID,
+                self.__RULE_RANK,
+                self.__ANTECEDENTS_ORDER,
+                self.__CONSEQUENTS_ORDER,
+            ],
+            kind="mergesort",
+        )
+        tmp_df = tmp_df.drop_duplicates([self.__BASKET_ID, self.__CONSEQUENT_ID])
+        consequent_ranks = tmp_df.groupby(self.__BASKET_ID).cumcount().to_numpy()
+        is_selected = consequent_ranks < n
+        return self.__make_n_rows_by_basket(
+            tmp_df[is_selected], consequent_ranks[is_selected], n_baskets, n
+        )
+
+    def __make_n_rows_by_basket(self, matches_df, ranks, n_baskets, n):
+        """
+        Adjust the rules to n rows for each of the baskets. The value of the added rows are NaN.
+        """
+        positions = matches_df[self.__BASKET_ID].to_numpy() * n + ranks
+        selected_rules_df = self.__rules.to_frame(
+            matches_df[self.__RULE_ID].to_numpy(),
+            self.__COLUMNS,
+            positions=positions,
+            n_rows=n_baskets * n,
+        )
+        selected_rules_df.insert(
+            0, self.__RANK, np.tile(np.arange(1, n + 1), n_baskets)
+        )
+        selected_rules_df.insert(
+            0, self.__BASKET_ID, np.repeat(np.arange(n_baskets), n)
+        )
+        return selected_rules_df
+
+    def __make_n_rows(self, rule_ids, n):
+        """
+        Make n ranked rows of the rules. The value of the added rows are NaN.
+        """
+        selected_rules_df = self.__rules.to_frame(
+            rule_ids[:n], self.__COLUMNS, n_rows=n
+        )
+        selected_rules_df.insert(0, self.__RANK, np.arange(1, n + 1))
+        return selected_rules_df
+
+
+class _RuleStore:
+    """
+    _RuleStore contains association rules with a single consequent as arrays.
+    The antecedents are a sparse rule-by-item matrix, the consequents are item ids, and the metrics are arrays by column.
+    The antecedent ids number the distinct antecedents in order of their first appearance.
+    """
+    __slots__ = ("items", "antecedents", "antecedent_ids", "consequent_ids", "metrics")
+    __ANTECEDENTS = "antecedents"
+    __CONSEQUENTS = "consequents"
+
+    def __init__(
+        self,
+        items=None,
+        antecedents=None,
+        antecedent_ids=None,
+        consequent_ids=None,
+        metrics=None,
+    ):
+        if items is None:
+            items = pd.Index([], dtype=object)
+        if antecedents is None:
+            antecedents = sparse.csr_matrix((0, len(items)), dtype=bool)
+        if antecedent_ids is None:
+            antecedent_ids = np.empty(0, dtype=np.int64)
+        if consequent_ids is None:
+            consequent_ids = np.empty(0, dtype=np.int32)
+        if metrics is None:
+            metrics = dict()
+        self.items = items
+        self.antecedents = antecedents
+        self.antecedent_ids = antecedent_ids
+        self.consequent_ids = consequent_ids
+        self.metrics = metrics
+
+    def __len__(self):
+        return len(self.consequent_ids)
+
+    def to_frame(self, rule_ids, columns, positions=None, n_rows=None):
+        """
+        Returns pandas.DataFrame of the rules, whose antecedents and consequents are frozensets of the items.
+        The frozensets are made once per distinct antecedent and consequent.
+        With n_rows, the rules are put at the positions of n_rows rows, and the value of the other rows are NaN.
+        """
+        if positions is None:
+            positions = np.arange(len(rule_ids))
+        if n_rows is None:
+            n_rows = len(rule_ids)
+        items = self.items.to_numpy()
+        data = dict()
+        for column in columns:
+            if column.__eq__(self.__ANTECEDENTS):
+                antecedent_ids, representatives, inverse = np.unique(
+                    self.antecedent_ids[rule_ids], return_index=True, return_inverse=True
+                )
+                indptr = self.antecedents.indptr
+                indices = self.antecedents.indices
+                antecedents = np.empty(len(antecedent_ids), dtype=object)
+                antecedents[:] = [
+                    frozenset(items[indices[indptr[rule_id]:indptr[rule_id + 1]]])
+                    for rule_id in rule_ids[representatives]
+                ]
+                data[column] = antecedents[inverse]
+            elif column.__eq__(self.__CONSEQUENTS):
+                consequent_ids, inverse = np.unique(
+                    self.consequent_ids[rule_ids], return_inverse=True
+                )
+                consequents = np.empty(len(consequent_ids), dtype=object)
+                consequents[:] = [frozenset([items[item_id]]) for item_id in consequent_ids]
+                data[column] = consequents[inverse]
+            elif column in self.metrics:
+                data[column] = self.metrics[column][rule_ids]
+            else:
+                data[column] = np.full(len(rule_ids), np.nan)
+        for column, values in data.items():
+            if values.dtype.kind.__eq__("f"):
+                padded_values = np.full(n_rows, np.nan, dtype=values.dtype)
+            else:
+                padded_values = np.full(n_rows, np.nan, dtype=object)
+            padded_values[positions] = values
+            data[column] = padded_values
+        return pd.DataFrame(data)
@@ -0,0 +1,54 @@
+"""
+Compare the engines of AssociationRules on the frequent itemsets of a synthetic dataset.
+
+    python -m benchmarks.association_rules_engines --supports 0.05 0.03 --thresholds 0.5 0
+"""
+import argparse
+import time
+
+from autoarm import AssociationRules, Dataset, FrequentItemsets
+from benchmarks.synthetic import ITEM_COLUMN, TRANSACTION_COLUMN, make_transactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--engines", nargs="+", default=["mlxtend", "native"])
+    parser.add_argument("--supports", type=float, nargs="+", default=[0.05, 0.03])
+    parser.add_argument("--metric", default="confidence")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.8, 0.5, 0])
+    args = parser.parse_args()
+    df = make_transactions(n_transactions=5000, n_items=200, mean_basket_size=20)
+    dataset = Dataset(df, TRANSACTION_COLUMN, ITEM_COLUMN)
+    print(
+        "{:>8} {:>10} {:>10} {:<8} {:>8} {:>10}".format(
+            "support", "itemsets", "threshold", "engine", "rules", "seconds"
+        )
+    )
+    for min_support in args.supports:
+        frequent_itemsets = FrequentItemsets(
+            dataset, min_support=min_support, algorithm="fpgrowth"
+        )
+        for min_threshold in args.thresholds:
+            for engine in args.engines:
+                start = time.perf_counter()
+                association_rules = AssociationRules(
+                    frequent_itemsets,
+                    metric=args.metric,
+                    min_threshold=min_threshold,
+                    engine=engine,
+                )
+                elapsed = time.perf_counter() - start
+                print(
+                    "{:>8} {:>10} {:>10} {:<8} {:>8} {:>10.3f}".format(
+                        min_support,
+                        len(frequent_itemsets.to_frame()),
+                        min_threshold,
+                        engine,
+                        len(association_rules.to_frame()),
+                        elapsed,
+                    )
+                )
+
+
+if __name__ == "__main__":
+    main()
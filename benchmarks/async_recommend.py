@@ -0,0 +1,69 @@
+"""
+Measure the throughput and latency percentiles of AsyncRecommender by the number of concurrent requests.
+
+    python -m benchmarks.async_recommend --concurrency 1 16 256 --requests 2000
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from autoarm import AsyncRecommender, Recommender
+
+from .recommender_construction import SyntheticAssociationRules
+
+
+async def run(async_recommender, baskets, concurrency):
+    queue = asyncio.Queue()
+    for items in baskets:
+        queue.put_nowait(items)
+
+    async def worker():
+        while not queue.empty():
+            await async_recommender.recommend(queue.get_nowait(), n=10)
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rules", type=int, default=100000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 256])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait", type=float, default=0.002)
+    args = parser.parse_args()
+    recommender = Recommender(SyntheticAssociationRules(args.rules, n_items=1000))
+    random_state = np.random.default_rng(0)
+    baskets = [
+        ["item_{}".format(item) for item in random_state.integers(0, 1000, size=3)]
+        for _ in range(args.requests)
+    ]
+    print(
+        "{:>11} {:>12} {:>8} {:>8} {:>8}".format(
+            "concurrency", "requests/s", "p50 ms", "p90 ms", "p99 ms"
+        )
+    )
+    for concurrency in args.concurrency:
+        async_recommender = AsyncRecommender(
+            recommender, max_batch_size=args.max_batch_size, max_wait=args.max_wait
+        )
+        start = time.perf_counter()
+        asyncio.run(run(async_recommender, baskets, concurrency))
+        elapsed = time.perf_counter() - start
+        percentiles = async_recommender.latency_percentiles()
+        async_recommender.close()
+        print(
+            "{:>11} {:>12.0f} {:>8.2f} {:>8.2f} {:>8.2f}".format(
+                concurrency,
+                len(baskets) / elapsed,
+                percentiles[50] * 1000,
+                percentiles[90] * 1000,
+                percentiles[99] * 1000,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
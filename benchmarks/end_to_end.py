@@ -0,0 +1,227 @@
+"""
+Measure every stage from Dataset to Recommender.recommend on synthetic datasets of several sizes, and write the
+seconds and peak traced memory of each stage and the latency percentiles of recommend() as a JSON report.
+With --compare, the report is compared with an earlier one, for example of the previous release.
+
+    python -m benchmarks.end_to_end --transactions 10000 100000 --output report.json
+    python -m benchmarks.end_to_end --compare report.json
+"""
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+
+import mlxtend
+import numpy as np
+import pandas as pd
+
+import autoarm
+from autoarm import AssociationRules, Dataset, FrequentItemsets, Recommender
+from benchmarks.synthetic import (
+    BASKET_SIZE_DISTRIBUTIONS,
+    ITEM_COLUMN,
+    TRANSACTION_COLUMN,
+    make_transactions,
+)
+
+STAGES = ["transactions", "dataset", "frequent_itemsets", "association_rules", "recommender"]
+PERCENTILES = [50, 90, 99]
+
+
+def measure(function, trace_memory):
+    """
+    Returns the result of function, the seconds it took and, with trace_memory, the peak bytes that it allocated.
+    The memory is traced on a second call, so that tracing does not slow down the timed one.
+    """
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    peak_bytes = None
+    if trace_memory:
+        tracemalloc.start()
+        function()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, {"seconds": seconds, "peak_bytes": peak_bytes}
+
+
+def run(n_transactions, args):
+    """
+    Returns the measurements of the stages on n_transactions synthetic transactions as dict.
+    """
+    stages = dict()
+    df, stages["transactions"] = measure(
+        lambda: make_transactions(
+            n_transactions=n_transactions,
+            n_items=args.items,
+            mean_basket_size=args.mean_basket_size,
+            zipf_exponent=args.zipf_exponent,
+            seed=args.seed,
+            basket_size_distribution=args.basket_size_distribution,
+        ),
+        args.memory,
+    )
+    dataset, stages["dataset"] = measure(
+        lambda: Dataset(df, TRANSACTION_COLUMN, ITEM_COLUMN, sparse=args.sparse),
+        args.memory,
+    )
+    frequent_itemsets, stages["frequent_itemsets"] = measure(
+        lambda: FrequentItemsets(
+            dataset, min_support=args.min_support, algorithm=args.algorithm
+        ),
+        args.memory,
+    )
+    association_rules, stages["association_rules"] = measure(
+        lambda: AssociationRules(
+            frequent_itemsets, min_threshold=args.min_threshold, engine=args.engine
+        ),
+        args.memory,
+    )
+    recommender, stages["recommender"] = measure(
+        lambda: Recommender(association_rules), args.memory
+    )
+
+    random_state = np.random.default_rng(args.seed)
+    baskets = df.groupby(TRANSACTION_COLUMN, sort=False)[ITEM_COLUMN].agg(list).to_numpy()
+    latencies = list()
+    for i in random_state.integers(0, len(baskets), size=args.requests):
+        start = time.perf_counter()
+        recommender.recommend(baskets[i], n=args.n)
+        latencies.append(time.perf_counter() - start)
+    return {
+        "n_transactions": n_transactions,
+        "n_rows": len(df),
+        "n_itemsets": len(frequent_itemsets.to_frame()),
+        "n_rules": len(association_rules.to_frame()),
+        "stages": stages,
+        "recommend": {
+            "requests": args.requests,
+            "percentiles": dict(
+                zip(
+                    [str(percentile) for percentile in PERCENTILES],
+                    np.percentile(latencies, PERCENTILES).tolist(),
+                )
+            ),
+        },
+    }
+
+
+def print_results(results):
+    """
+    Print the seconds and peak megabytes of each stage and the latency percentiles of recommend() in seconds.
+    """
+    print(
+        "{:>12} {:<18} {:>10} {:>10}".format("transactions", "stage", "seconds", "peak MB")
+    )
+    for result in results:
+        for stage in STAGES:
+            measurement = result["stages"][stage]
+            peak_bytes = measurement["peak_bytes"]
+            print(
+                "{:>12} {:<18} {:>10.3f} {:>10}".format(
+                    result["n_transactions"],
+                    stage,
+                    measurement["seconds"],
+                    "-" if peak_bytes is None else "{:.1f}".format(peak_bytes / 1024 ** 2),
+                )
+            )
+        for percentile, seconds in result["recommend"]["percentiles"].items():
+            print(
+                "{:>12} {:<18} {:>10.3f}".format(
+                    result["n_transactions"], "recommend p" + percentile, seconds
+                )
+            )
+
+
+def print_comparison(results, earlier_results):
+    """
+    Print the ratios of the seconds and peak bytes to those of the earlier report for the same transaction counts.
+    """
+    earlier_by_size = {result["n_transactions"]: result for result in earlier_results}
+    print(
+        "{:>12} {:<18} {:>14} {:>14}".format(
+            "transactions", "stage", "seconds ratio", "memory ratio"
+        )
+    )
+    for result in results:
+        earlier = earlier_by_size.get(result["n_transactions"])
+        if earlier is None:
+            continue
+        rows = [
+            (stage, result["stages"][stage], earlier["stages"].get(stage, dict()))
+            for stage in STAGES
+        ]
+        rows += [
+            (
+                "recommend p" + percentile,
+                {"seconds": seconds},
+                {"seconds": earlier["recommend"]["percentiles"].get(percentile)},
+            )
+            for percentile, seconds in result["recommend"]["percentiles"].items()
+        ]
+        for stage, measurement, earlier_measurement in rows:
+            ratios = list()
+            for key in ["seconds", "peak_bytes"]:
+                value = measurement.get(key)
+                earlier_value = earlier_measurement.get(key)
+                if value is None or not earlier_value:
+                    ratios.append("-")
+                else:
+                    ratios.append("{:.2f}".format(value / earlier_value))
+            print(
+                "{:>12} {:<18} {:>14} {:>14}".format(
+                    result["n_transactions"], stage, *ratios
+                )
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transactions", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--mean-basket-size", type=float, default=8)
+    parser.add_argument(
+        "--basket-size-distribution", choices=BASKET_SIZE_DISTRIBUTIONS, default="poisson"
+    )
+    parser.add_argument("--zipf-exponent", type=float, default=1.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sparse", action="store_true")
+    parser.add_argument("--min-support", type=float, default=0.01)
+    parser.add_argument("--algorithm", default="fpgrowth")
+    parser.add_argument("--min-threshold", type=float, default=0.1)
+    parser.add_argument("--engine", default="native")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--n", type=int, default=10)
+    parser.add_argument("--no-memory", dest="memory", action="store_false")
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+    results = [run(n_transactions, args) for n_transactions in args.transactions]
+    report = {
+        "autoarm": autoarm.__version__,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "mlxtend": mlxtend.__version__,
+        },
+        "parameters": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ["output", "compare"]
+        },
+        "results": results,
+    }
+    print_results(results)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f)["results"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare the mining algorithms of FrequentItemsets on synthetic datasets at several support thresholds.
+
+    python -m benchmarks.frequent_itemsets_algorithms --datasets short-baskets --supports 0.05 0.02
+    python -m benchmarks.frequent_itemsets_algorithms --algorithms fpgrowth eclat --epsilon 0.005 --verify
+"""
+import argparse
+import time
+
+from autoarm import Dataset, FrequentItemsets
+from benchmarks.synthetic import ITEM_COLUMN, TRANSACTION_COLUMN, make_transactions
+
+DATASETS = {
+    "short-baskets": dict(n_transactions=20000, n_items=500, mean_basket_size=4),
+    "long-baskets": dict(n_transactions=5000, n_items=200, mean_basket_size=20),
+}
+# apriori runs out of memory on long-baskets below 0.05.
+SUPPORTS = {
+    "short-baskets": [0.1, 0.05, 0.02, 0.01],
+    "long-baskets": [0.2, 0.1, 0.05],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--algorithms",
+        nargs="+",
+        default=["apriori", "fpgrowth", "fpmax", "hmine", "bitset", "eclat", "declat"],
+    )
+    parser.add_argument("--supports", type=float, nargs="+")
+    parser.add_argument("--datasets", nargs="+", default=list(DATASETS))
+    parser.add_argument("--sparse", action="store_true")
+    parser.add_argument("--epsilon", type=float)
+    parser.add_argument("--verify", action="store_true")
+    args = parser.parse_args()
+    print(
+        "{:<14} {:>8} {:<10} {:>10} {:>10}".format(
+            "dataset", "support", "algorithm", "itemsets", "seconds"
+        )
+    )
+    for name in args.datasets:
+        df = make_transactions(**DATASETS[name])
+        dataset = Dataset(df, TRANSACTION_COLUMN, ITEM_COLUMN, sparse=args.sparse)
+        for min_support in args.supports or SUPPORTS[name]:
+            for algorithm in args.algorithms:
+                # fpmax mines only the maximal itemsets, which cannot be verified.
+                if args.verify and algorithm == "fpmax":
+                    continue
+                start = time.perf_counter()
+                frequent_itemsets = FrequentItemsets(
+                    dataset,
+                    min_support=min_support,
+                    algorithm=algorithm,
+                    epsilon=args.epsilon,
+                    verify=args.verify,
+                )
+                elapsed = time.perf_counter() - start
+                print(
+                    "{:<14} {:>8} {:<10} {:>10} {:>10.3f}".format(
+                        name,
+                        min_support,
+                        algorithm,
+                        len(frequent_itemsets.to_frame()),
+                        elapsed,
+                    )
+                )
+
+
+if __name__ == "__main__":
+    main()
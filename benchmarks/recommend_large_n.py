@@ -0,0 +1,33 @@
+"""
+Measure the latency of Recommender.recommend for large n, where most of the rows can be padding.
+
+    python -m benchmarks.recommend_large_n --matched 100 10000 --n 10 1000 10000
+"""
+import argparse
+import time
+
+from autoarm import Recommender
+
+from .recommend_latency import HubAssociationRules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--matched", type=int, nargs="+", default=[100, 10000])
+    parser.add_argument("--n", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print("{:>10} {:>7} {:>12}".format("matched", "n", "milliseconds"))
+    for n_matched in args.matched:
+        recommender = Recommender(HubAssociationRules(n_matched, n_rules=10000))
+        for n in args.n:
+            elapsed = list()
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                recommender.recommend([HubAssociationRules.HUB], n=n)
+                elapsed.append(time.perf_counter() - start)
+            print("{:>10} {:>7} {:>12.3f}".format(n_matched, n, min(elapsed) * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Measure the latency of Recommender.recommend by the number of rules matched with the basket.
+
+    python -m benchmarks.recommend_latency --matched 100 10000 1000000 --n 3 10
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from autoarm import Recommender
+
+from .recommender_construction import SyntheticAssociationRules
+
+
+class HubAssociationRules:
+    """
+    HubAssociationRules contains synthetic association rules and n_matched rules whose antecedent is the hub item.
+    """
+    HUB = "hub"
+
+    def __init__(self, n_matched, n_rules=100000, n_items=50000, seed=0):
+        random_state = np.random.default_rng(seed)
+        consequents = random_state.integers(0, n_items, size=n_matched)
+        confidence = random_state.uniform(0.1, 1, size=n_matched)
+        hub_df = pd.DataFrame(
+            {
+                "antecedents": [frozenset([self.HUB])] * n_matched,
+                "consequents": [
+                    frozenset(["item_{}".format(item)]) for item in consequents
+                ],
+                "support": random_state.uniform(0.001, 0.1, size=n_matched),
+                "confidence": confidence,
+                "lift": confidence / random_state.uniform(0.01, 0.5, size=n_matched),
+            }
+        )
+        self.__df = pd.concat(
+            [SyntheticAssociationRules(n_rules, n_items, seed=seed).to_frame(), hub_df],
+            ignore_index=True,
+        ).sort_values(["confidence", "support", "lift"], ascending=False)
+
+    def to_frame(self):
+        """
+        Returns pandas.DataFrame.
+        """
+        return self.__df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--matched", type=int, nargs="+", default=[100, 10000, 1000000]
+    )
+    parser.add_argument("--n", type=int, nargs="+", default=[3, 10])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print("{:>10} {:>5} {:>12}".format("matched", "n", "milliseconds"))
+    for n_matched in args.matched:
+        recommender = Recommender(HubAssociationRules(n_matched))
+        for n in args.n:
+            elapsed = list()
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                recommender.recommend([HubAssociationRules.HUB], n=n)
+                elapsed.append(time.perf_counter() - start)
+            print("{:>10} {:>5} {:>12.3f}".format(n_matched, n, min(elapsed) * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Measure the construction time of Recommender on synthetic association rules.
+
+    python -m benchmarks.recommender_construction --sizes 10000 100000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from autoarm import Recommender
+
+
+class SyntheticAssociationRules:
+    """
+    SyntheticAssociationRules contains randomly generated association rules.
+    """
+
+    def __init__(self, n_rules, n_items=50000, max_size=3, seed=0):
+        random_state = np.random.default_rng(seed)
+        items = np.array(["item_{}".format(i) for i in range(n_items)], dtype=object)
+        antecedent_sizes = random_state.integers(1, max_size + 1, size=n_rules)
+        consequent_sizes = random_state.integers(1, max_size + 1, size=n_rules)
+        drawn = random_state.integers(
+            0, n_items, size=int(antecedent_sizes.sum() + consequent_sizes.sum())
+        )
+        antecedents = list()
+        consequents = list()
+        position = 0
+        for antecedent_size, consequent_size in zip(antecedent_sizes, consequent_sizes):
+            antecedents.append(frozenset(items[drawn[position:position + antecedent_size]]))
+            position += antecedent_size
+            consequents.append(frozenset(items[drawn[position:position + consequent_size]]))
+            position += consequent_size
+        support = random_state.uniform(0.001, 0.1, size=n_rules)
+        confidence = random_state.uniform(0.1, 1, size=n_rules)
+        self.__df = pd.DataFrame(
+            {
+                "antecedents": antecedents,
+                "consequents": consequents,
+                "support": support,
+                "confidence": confidence,
+                "lift": confidence / random_state.uniform(0.01, 0.5, size=n_rules),
+            }
+        ).sort_values(["confidence", "support", "lift"], ascending=False)
+
+    def to_frame(self):
+        """
+        Returns pandas.DataFrame.
+        """
+        return self.__df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000, 1000000]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print("{:>10} {:>12}".format("rules", "seconds"))
+    for n_rules in args.sizes:
+        association_rules = SyntheticAssociationRules(n_rules)
+        elapsed = list()
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            Recommender(association_rules)
+            elapsed.append(time.perf_counter() - start)
+        print("{:>10} {:>12.3f}".format(n_rules, min(elapsed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Seeded synthetic retail transactions for the benchmarks.
+"""
+import numpy as np
+import pandas as pd
+
+TRANSACTION_COLUMN = "transaction_id"
+ITEM_COLUMN = "item_id"
+BASKET_SIZE_DISTRIBUTIONS = ["poisson", "geometric", "lognormal"]
+
+
+def zipf_probabilities(n, exponent):
+    """
+    Returns the probabilities of n ranks whose popularity follows Zipf's law.
+    """
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def make_basket_sizes(n_transactions, mean_basket_size, distribution, random_state):
+    """
+    Returns the sizes of n_transactions baskets, at least 1 and about mean_basket_size on average.
+    "geometric" and "lognormal" have longer tails than "poisson", with a few large baskets.
+    """
+    if "poisson".__eq__(distribution):
+        return 1 + random_state.poisson(max(mean_basket_size - 1, 0), n_transactions)
+    if "geometric".__eq__(distribution):
+        return random_state.geometric(1 / max(mean_basket_size, 1), n_transactions)
+    if "lognormal".__eq__(distribution):
+        sigma = 1.0
+        mean = np.log(max(mean_basket_size - 1, 0.01)) - sigma ** 2 / 2
+        sizes = random_state.lognormal(mean, sigma, n_transactions)
+        return 1 + np.round(sizes).astype(np.int64)
+    raise ValueError()
+
+
+def make_transactions(
+    n_transactions=10000,
+    n_items=1000,
+    mean_basket_size=8,
+    n_patterns=100,
+    mean_pattern_size=4,
+    pattern_probability=0.5,
+    zipf_exponent=1.1,
+    seed=0,
+    basket_size_distribution="poisson",
+):
+    """
+    Returns pandas.DataFrame of transaction_id and item_id.
+    Each basket has random items of Zipfian popularity and, with pattern_probability, one of the patterns,
+    itemsets that are bought together and whose popularity is also Zipfian.
+    The basket sizes follow basket_size_distribution, one of BASKET_SIZE_DISTRIBUTIONS.
+    """
+    random_state = np.random.default_rng(seed)
+    item_probabilities = zipf_probabilities(n_items, zipf_exponent)
+    pattern_sizes = 2 + random_state.poisson(max(mean_pattern_size - 2, 0), n_patterns)
+    pattern_items = random_state.choice(
+        n_items, size=pattern_sizes.sum(), p=item_probabilities
+    )
+    pattern_indptr = np.concatenate([[0], np.cumsum(pattern_sizes)])
+
+    basket_sizes = make_basket_sizes(
+        n_transactions, mean_basket_size, basket_size_distribution, random_state
+    )
+    transaction_ids = [np.repeat(np.arange(n_transactions), basket_sizes)]
+    item_ids = [
+        random_state.choice(n_items, size=basket_sizes.sum(), p=item_probabilities)
+    ]
+
+    with_pattern = np.flatnonzero(random_state.random(n_transactions) < pattern_probability)
+    patterns = random_state.choice(
+        n_patterns, size=len(with_pattern), p=zipf_probabilities(n_patterns, zipf_exponent)
+    )
+    lengths = pattern_sizes[patterns]
+    starts = np.repeat(pattern_indptr[patterns], lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    transaction_ids.append(np.repeat(with_pattern, lengths))
+    item_ids.append(pattern_items[starts + offsets])
+
+    return pd.DataFrame(
+        {
+            TRANSACTION_COLUMN: np.concatenate(transaction_ids),
+            ITEM_COLUMN: np.concatenate(item_ids),
+        }
+    )
@@ -13,7 +13,7 @@ setuptools.setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/daikikatsuragawa/autoarm",
-    install_requires=["pandas", "mlxtend", "numpy", "df4loop"],
+    install_requires=["pandas", "mlxtend>=0.22.0", "numpy", "scipy"],
     packages=setuptools.find_packages(),
     license="Apache-2.0",
     classifiers=[
@@ -1,7 +1,10 @@
+import itertools
+
+import numpy as np
 import pandas as pd
 import pytest
 
-from autoarm import AssociationRules, Dataset, FrequentItemsets
+from autoarm import AssociationRules, Dataset, FrequentItemsets, Recommender
 
 sample_dataset = {
     "transaction_id": 
@@ -74,3 +77,114 @@ def test():
         association_rules = AssociationRules(frequent_itemsets,
                                              metric=metric,
                                              min_threshold=min_lift)
+
+
+def test_engine():
+    sample_df = pd.DataFrame.from_dict(sample_dataset)
+    transaction_column = "transaction_id"
+    item_column = "item_id"
+    dataset = Dataset(sample_df, transaction_column, item_column)
+    frequent_itemsets = FrequentItemsets(dataset, 0.01)
+    for metric, min_thresholds in [("confidence", [0, 0.5, 1]), ("lift", [0, 1.5])]:
+        for min_threshold in min_thresholds:
+            expected_df = AssociationRules(frequent_itemsets, metric=metric,
+                                           min_threshold=min_threshold).to_frame()
+            df = AssociationRules(frequent_itemsets, metric=metric,
+                                  min_threshold=min_threshold,
+                                  engine="native").to_frame()
+            assert df.columns.tolist() == expected_df.columns.tolist()
+            expected = {(row[0], row[1]): row[2:]
+                        for row in expected_df.itertuples(index=False)}
+            actual = {(row[0], row[1]): row[2:]
+                      for row in df.itertuples(index=False)}
+            assert actual.keys() == expected.keys()
+            for rule in expected:
+                for a, b in zip(actual[rule], expected[rule]):
+                    assert abs(a - b) < 0.000001
+            sort_by_columns = (["confidence", "support", "lift"]
+                               if metric == "confidence" else
+                               ["lift", "support", "confidence"])
+            pd.testing.assert_frame_equal(df[sort_by_columns],
+                                          expected_df[sort_by_columns])
+
+    with pytest.raises(ValueError):
+        association_rules = AssociationRules(frequent_itemsets, engine="other")
+
+    with pytest.raises(ValueError):
+        association_rules = AssociationRules(
+            FrequentItemsets(dataset, 0.01, algorithm="fpmax"), min_threshold=0,
+            engine="native")
+
+
+def test_prune_redundant():
+    sample_df = pd.DataFrame.from_dict(sample_dataset)
+    transaction_column = "transaction_id"
+    item_column = "item_id"
+    # The rules of the random dataset tie on the metrics.
+    is_bought = np.random.default_rng(5).random((10, 8)) < 0.5
+    transaction_ids, item_ids = np.nonzero(is_bought)
+    dfs = [sample_df, pd.DataFrame({
+        transaction_column: transaction_ids,
+        item_column: ["i{}".format(item_id) for item_id in item_ids],
+    })]
+    for df in dfs:
+        dataset = Dataset(df, transaction_column, item_column)
+        frequent_itemsets = FrequentItemsets(dataset, 0.1)
+        items = sorted(df[item_column].unique())
+        for engine in ["mlxtend", "native"]:
+            for metric, min_threshold in [("confidence", 0), ("lift", 1)]:
+                association_rules = AssociationRules(
+                    frequent_itemsets, metric=metric,
+                    min_threshold=min_threshold, engine=engine)
+                pruned_association_rules = AssociationRules(
+                    frequent_itemsets, metric=metric,
+                    min_threshold=min_threshold, engine=engine,
+                    prune_redundant=True)
+                rules_df = association_rules.to_frame()
+                pruned_df = pruned_association_rules.to_frame()
+                assert association_rules.pruning_info() == {
+                    "generated": len(rules_df), "pruned": 0,
+                    "kept": len(rules_df)}
+                assert pruned_association_rules.pruning_info() == {
+                    "generated": len(rules_df),
+                    "pruned": len(rules_df) - len(pruned_df),
+                    "kept": len(pruned_df)}
+                assert len(pruned_df) < len(rules_df)
+
+                confidence_by_rule = dict(zip(
+                    zip(rules_df["antecedents"], rules_df["consequents"]),
+                    rules_df["confidence"]))
+                kept_rules = frozenset(zip(pruned_df["antecedents"],
+                                           pruned_df["consequents"]))
+                for (antecedent, consequent), confidence in confidence_by_rule.items():
+                    is_redundant = any(
+                        confidence_by_rule.get((antecedent - {item}, consequent),
+                                               -1) >= confidence
+                        for item in antecedent)
+                    if is_redundant:
+                        assert (antecedent, consequent) not in kept_rules
+
+                # The rules that tie on the metrics may be ordered differently,
+                # so the consequents are compared by their metrics.
+                recommender = Recommender(association_rules)
+                pruned_recommender = Recommender(pruned_association_rules)
+                columns = ["rank", "support", "confidence", "lift"]
+                for size in [1, 2, 3]:
+                    for basket in itertools.combinations(items, size):
+                        for recommend_metric in ["confidence", "lift"]:
+                            assert pruned_recommender.recommend(
+                                basket, n=3, metric=recommend_metric
+                            )[columns].equals(recommender.recommend(
+                                basket, n=3, metric=recommend_metric)[columns])
+                            consequents_by_metrics = list()
+                            for rules in [recommender, pruned_recommender]:
+                                consequents = dict()
+                                for row in rules.recommend(
+                                        basket, n=len(items),
+                                        metric=recommend_metric
+                                ).dropna().itertuples(index=False):
+                                    consequents.setdefault(
+                                        (row.support, row.confidence, row.lift),
+                                        set()).add(row.consequents)
+                                consequents_by_metrics.append(consequents)
+                            assert consequents_by_metrics[0] == consequents_by_metrics[1]
@@ -0,0 +1,79 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from autoarm import (
+    AssociationRules,
+    AsyncRecommender,
+    Dataset,
+    FrequentItemsets,
+    Recommender,
+)
+
+sample_dataset = {
+    "transaction_id": 
+    [1, 1, 1, 1, 2, 2, 2, 3, 3, 4, 4, 5, 5, 5, 5, 6, 6, 6, 7, 7, 8, 8],
+    "item_id": [
+        "A", "B", "C", "D", "A", "B", "C", "A", "B", "A", "E", "F", "B", "C", "D",
+        "F","B","C", "F", "B", "A", "E"
+    ],
+}
+
+
+def test():
+    sample_df = pd.DataFrame.from_dict(sample_dataset)
+    dataset = Dataset(sample_df, "transaction_id", "item_id")
+    frequent_itemsets = FrequentItemsets(dataset, min_support=0.01)
+    association_rules = AssociationRules(frequent_itemsets, min_threshold=0)
+    recommender = Recommender(association_rules, n=3)
+    async_recommender = AsyncRecommender(recommender, max_batch_size=4, max_wait=0.01)
+
+    requests = [
+        (["A"], dict()),
+        (["B", "F"], dict()),
+        (["other"], dict()),
+        (["A"], dict(n=5, metric="lift")),
+        (["C"], dict(sort_by_columns=["support"])),
+        (["D", "E"], dict(allow_from_items=True)),
+    ]
+
+    async def recommend_all():
+        return await asyncio.gather(*[
+            async_recommender.recommend(items, **kwargs)
+            for items, kwargs in requests
+        ])
+
+    for recommend_rules, (items, kwargs) in zip(
+            asyncio.run(recommend_all()), requests):
+        pd.testing.assert_frame_equal(
+            recommend_rules, recommender.recommend(items, **kwargs),
+            check_dtype=False)
+
+    percentiles = async_recommender.latency_percentiles()
+    assert list(percentiles) == [50, 90, 99]
+    assert 0 <= percentiles[50] <= percentiles[99]
+
+    with pytest.raises(ValueError):
+        asyncio.run(async_recommender.recommend([]))
+
+    with pytest.raises(ValueError):
+        asyncio.run(async_recommender.recommend(["A"], n=0))
+
+    async_recommender.close()
+
+    # A request that times out leaves its timer on an event loop that closes.
+    async_recommender = AsyncRecommender(recommender, max_batch_size=4, max_wait=0.1)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(async_recommender.recommend(["A"]), 0.01))
+    recommend_rules = asyncio.run(
+        asyncio.wait_for(async_recommender.recommend(["A"]), 5))
+    pd.testing.assert_frame_equal(recommend_rules, recommender.recommend(["A"]),
+                                  check_dtype=False)
+    async_recommender.close()
+
+    with pytest.raises(ValueError):
+        AsyncRecommender(recommender, max_batch_size=0)
+
+    with pytest.raises(ValueError):
+        AsyncRecommender(recommender, max_wait=-1)
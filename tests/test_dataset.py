@@ -31,3 +31,73 @@ def test():
         dataset = Dataset(
             sample_df, transaction_column=transaction_column, item_column="other"
         )
+
+
+def test_sparse():
+    sample_df = pd.DataFrame.from_dict(sample_dataset)
+    transaction_column = "transaction_id"
+    item_column = "item_id"
+    dataset = Dataset(sample_df, transaction_column, item_column, sparse=True)
+    assert type(dataset.to_frame()) == pd.core.frame.DataFrame
+    assert hasattr(dataset.to_frame(), "sparse")
+
+    dense_dataset = Dataset(sample_df, transaction_column, item_column)
+    pd.testing.assert_frame_equal(
+        dataset.to_frame().sparse.to_dense(), dense_dataset.to_frame()
+    )
+
+
+def test_encoding():
+    sample_df = pd.DataFrame.from_dict({
+        "transaction_id": [2, 2, 1, 1, 1, 3],
+        "item_id": ["B", "A", "C", "A", "C", "B"],
+    })
+    for sparse in [False, True]:
+        dataset = Dataset(sample_df, "transaction_id", "item_id", sparse=sparse)
+        df = dataset.to_frame()
+        if sparse:
+            df = df.sparse.to_dense()
+        assert df.columns.tolist() == ["A", "B", "C"]
+        assert df.values.tolist() == [
+            [True, False, True],
+            [True, True, False],
+            [False, True, False],
+        ]
+
+
+def test_from_files(tmp_path):
+    sample_df = pd.DataFrame.from_dict(sample_dataset)
+    paths = [str(tmp_path / "first.csv"), str(tmp_path / "second.csv")]
+    sample_df.iloc[:13].to_csv(paths[0], index=False)
+    sample_df.iloc[13:].to_csv(paths[1], index=False)
+    expected = Dataset(
+        sample_df.astype(str), "transaction_id", "item_id"
+    ).to_frame()
+    for chunksize in [1, 3, 100]:
+        dataset = Dataset.from_files(
+            paths, "transaction_id", "item_id", chunksize=chunksize
+        )
+        pd.testing.assert_frame_equal(dataset.to_frame(), expected)
+
+    dataset = Dataset.from_files(paths, "transaction_id", "item_id", sparse=True)
+    pd.testing.assert_frame_equal(dataset.to_frame().sparse.to_dense(), expected)
+
+    with pytest.raises(ValueError):
+        Dataset.from_files(paths, "other", "item_id")
+
+    with pytest.raises(ValueError):
+        Dataset.from_files(paths, "transaction_id", "item_id", chunksize=0)
+
+    pytest.importorskip("pyarrow")
+    parquet_paths = [str(tmp_path / "first.parquet"), str(tmp_path / "second.pq")]
+    sample_df.iloc[:13].to_parquet(parquet_paths[0], index=False)
+    sample_df.iloc[13:].to_parquet(parquet_paths[1], index=False)
+    expected = Dataset(sample_df, "transaction_id", "item_id").to_frame()
+    for chunksize in [1, 3, 100]:
+        dataset = Dataset.from_files(
+            parquet_paths, "transaction_id", "item_id", chunksize=chunksize
+        )
+        pd.testing.assert_frame_equal(dataset.to_frame(), expected)
+
+    with pytest.raises(ValueError):
+        Dataset.from_files(parquet_paths, "other", "item_id")
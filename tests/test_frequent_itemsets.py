@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -44,3 +45,308 @@ def test():
     with pytest.raises(ValueError):
         min_support = 2
         frequent_itemsets = FrequentItemsets(dataset, min_support)
+
+
+def test_sparse():
+    sample_df = pd.DataFrame.from_dict(sample_dataset)
+    transaction_column = "transaction_id"
+    item_column = "item_id"
+    dataset = Dataset(sample_df, transaction_column, item_column, sparse=True)
+    dense_dataset = Dataset(sample_df, transaction_column, item_column)
+    for min_support in [0.01, 0.5, 1]:
+        frequent_itemsets = FrequentItemsets(dataset, min_support)
+        dense_frequent_itemsets = FrequentItemsets(dense_dataset, min_support)
+        pd.testing.assert_frame_equal(
+            frequent_itemsets.to_frame(), dense_frequent_itemsets.to_frame()
+        )
+
+
+def test_algorithm():
+    sample_df = pd.DataFrame.from_dict(sample_dataset)
+    transaction_column = "transaction_id"
+    item_column = "item_id"
+    dataset = Dataset(sample_df, transaction_column, item_column)
+    for min_support in [0.01, 0.5, 1]:
+        frequent_itemsets = FrequentItemsets(dataset, min_support)
+        expected = dict(zip(frequent_itemsets.to_frame()["itemsets"],
+                            frequent_itemsets.to_frame()["support"]))
+        for algorithm in ["apriori", "fpgrowth", "hmine", "bitset", "eclat",
+                          "declat"]:
+            frequent_itemsets = FrequentItemsets(dataset, min_support,
+                                                 algorithm=algorithm)
+            df = frequent_itemsets.to_frame()
+            assert df.columns.tolist() == ["support", "itemsets"]
+            assert df["support"].dtype == float
+            assert df["support"].is_monotonic_decreasing
+            actual = dict(zip(df["itemsets"], df["support"]))
+            assert actual.keys() == expected.keys()
+            for itemset in expected:
+                assert abs(actual[itemset] - expected[itemset]) < 0.000001
+
+        frequent_itemsets = FrequentItemsets(dataset, min_support,
+                                             algorithm="fpmax")
+        for itemset in frequent_itemsets.to_frame()["itemsets"]:
+            assert itemset in expected
+            assert not any(itemset < other for other in expected)
+
+    empty_df = sample_df[sample_df[transaction_column] < 0]
+    for sparse in [False, True]:
+        dataset = Dataset(empty_df, transaction_column, item_column,
+                          sparse=sparse)
+        for algorithm in ["apriori", "fpgrowth", "hmine", "fpmax", "bitset",
+                          "eclat", "declat"]:
+            frequent_itemsets = FrequentItemsets(dataset, algorithm=algorithm)
+            assert len(frequent_itemsets.to_frame()) == 0
+
+    with pytest.raises(ValueError):
+        frequent_itemsets = FrequentItemsets(dataset, algorithm="other")
+
+
+def test_top_k():
+    sample_df = pd.DataFrame.from_dict(sample_dataset)
+    transaction_column = "transaction_id"
+    item_column = "item_id"
+    dataset = Dataset(sample_df, transaction_column, item_column)
+    expected_df = FrequentItemsets(dataset, 0.01).to_frame()
+    for max_len in [None, 1, 2]:
+        if max_len is not None:
+            lengths = expected_df["itemsets"].map(len)
+            all_df = expected_df[lengths <= max_len]
+        else:
+            all_df = expected_df
+        for top_k in [1, 3, 10, 100]:
+            for algorithm in [None, "eclat", "declat"]:
+                frequent_itemsets = FrequentItemsets(dataset, algorithm=algorithm,
+                                                     max_len=max_len,
+                                                     top_k=top_k)
+                df = frequent_itemsets.to_frame()
+                assert df["support"].is_monotonic_decreasing
+                min_support = all_df["support"].iloc[
+                    min(top_k, len(all_df)) - 1]
+                expected = all_df[all_df["support"] >= min_support - 0.000001]
+                assert len(df) >= min(top_k, len(all_df))
+                assert frozenset(df["itemsets"]) == frozenset(
+                    expected["itemsets"])
+
+    frequent_itemsets = FrequentItemsets(dataset, 0.3, top_k=100)
+    df = frequent_itemsets.to_frame()
+    assert frozenset(df["itemsets"]) == frozenset(
+        FrequentItemsets(dataset, 0.3).to_frame()["itemsets"])
+
+    with pytest.raises(ValueError):
+        frequent_itemsets = FrequentItemsets(dataset, top_k=0)
+
+    with pytest.raises(ValueError):
+        frequent_itemsets = FrequentItemsets(dataset, algorithm="apriori",
+                                             top_k=3)
+
+    with pytest.raises(ValueError):
+        frequent_itemsets = FrequentItemsets(dataset, top_k=3)
+        frequent_itemsets.update(dataset)
+
+
+def test_closed():
+    sample_df = pd.DataFrame.from_dict(sample_dataset)
+    transaction_column = "transaction_id"
+    item_column = "item_id"
+    dataset = Dataset(sample_df, transaction_column, item_column)
+    for min_support in [0.01, 0.3]:
+        expected_df = FrequentItemsets(dataset, min_support).to_frame()
+        support_by_itemset = dict(zip(expected_df["itemsets"],
+                                      expected_df["support"]))
+        expected = frozenset(
+            itemset for itemset, support in support_by_itemset.items()
+            if not any(itemset < other and abs(support - other_support) < 0.000001
+                       for other, other_support in support_by_itemset.items()))
+        for algorithm in ["apriori", "fpgrowth", "eclat"]:
+            frequent_itemsets = FrequentItemsets(dataset, min_support,
+                                                 algorithm=algorithm,
+                                                 closed=True)
+            df = frequent_itemsets.to_frame()
+            assert frozenset(df["itemsets"]) == expected
+            assert df["support"].is_monotonic_decreasing
+            for itemset, support in zip(df["itemsets"], df["support"]):
+                assert abs(support - support_by_itemset[itemset]) < 0.000001
+
+    with pytest.raises(ValueError):
+        frequent_itemsets = FrequentItemsets(dataset, 0.01, closed=True)
+        frequent_itemsets.update(dataset)
+
+
+def test_approximate():
+    sample_df = pd.DataFrame.from_dict(sample_dataset)
+    transaction_column = "transaction_id"
+    item_column = "item_id"
+    large_df = pd.concat(
+        [sample_df.assign(transaction_id=sample_df[transaction_column] + 100 * i)
+         for i in range(2000)], ignore_index=True)
+    for sparse in [False, True]:
+        dataset = Dataset(large_df, transaction_column, item_column,
+                          sparse=sparse)
+        for min_support in [0.2, 0.5]:
+            expected_df = FrequentItemsets(dataset, min_support).to_frame()
+            expected = dict(zip(expected_df["itemsets"], expected_df["support"]))
+            for algorithm in ["apriori", "fpgrowth", "eclat"]:
+                frequent_itemsets = FrequentItemsets(dataset, min_support,
+                                                     algorithm=algorithm,
+                                                     epsilon=0.05,
+                                                     random_state=0)
+                assert frequent_itemsets.sample_size() < len(dataset.to_frame())
+                df = frequent_itemsets.to_frame()
+                assert df["support"].is_monotonic_decreasing
+                actual = dict(zip(df["itemsets"], df["support"]))
+                for itemset in actual:
+                    assert actual[itemset] >= min_support - 0.05
+                for itemset in expected:
+                    assert abs(actual[itemset] - expected[itemset]) < 0.05
+
+                frequent_itemsets = FrequentItemsets(dataset, min_support,
+                                                     algorithm=algorithm,
+                                                     epsilon=0.05, verify=True,
+                                                     random_state=0)
+                df = frequent_itemsets.to_frame()
+                actual = dict(zip(df["itemsets"], df["support"]))
+                assert actual.keys() == expected.keys()
+                for itemset in expected:
+                    assert abs(actual[itemset] - expected[itemset]) < 0.000001
+
+    dataset = Dataset(sample_df, transaction_column, item_column)
+    frequent_itemsets = FrequentItemsets(dataset, 0.3, epsilon=0.1)
+    assert frequent_itemsets.sample_size() is None
+    pd.testing.assert_frame_equal(frequent_itemsets.to_frame(),
+                                  FrequentItemsets(dataset, 0.3).to_frame())
+
+    with pytest.raises(ValueError):
+        frequent_itemsets = FrequentItemsets(dataset, 0.3, epsilon=0.3)
+
+    with pytest.raises(ValueError):
+        frequent_itemsets = FrequentItemsets(dataset, 0.3, epsilon=0.1, delta=1)
+
+    with pytest.raises(ValueError):
+        frequent_itemsets = FrequentItemsets(dataset, epsilon=0.1, top_k=3)
+
+    with pytest.raises(ValueError):
+        frequent_itemsets = FrequentItemsets(dataset, 0.3, epsilon=0.1)
+        frequent_itemsets.update(dataset)
+
+
+def test_memory():
+    sample_df = pd.DataFrame.from_dict(sample_dataset)
+    transaction_column = "transaction_id"
+    item_column = "item_id"
+    for sparse in [False, True]:
+        dataset = Dataset(sample_df, transaction_column, item_column,
+                          sparse=sparse)
+        frequent_itemsets = FrequentItemsets(dataset, 0.01)
+        assert not frequent_itemsets.is_low_memory()
+        peak_rss = frequent_itemsets.peak_rss()
+        assert peak_rss is None or peak_rss > 0
+        # The peak of an earlier allocation does not count towards mining.
+        allocation = np.ones(2 ** 30, dtype=np.uint8)
+        del allocation
+        peak_rss = FrequentItemsets(dataset, 0.01).peak_rss()
+        assert peak_rss is None or peak_rss < 2 ** 30
+        expected_df = frequent_itemsets.to_frame()
+        expected = dict(zip(expected_df["itemsets"], expected_df["support"]))
+
+        frequent_itemsets = FrequentItemsets(dataset, 0.01, max_len=2)
+        df = frequent_itemsets.to_frame()
+        assert df["itemsets"].map(len).max() == 2
+        assert len(df) == sum(len(itemset) <= 2 for itemset in expected)
+
+        frequent_itemsets = FrequentItemsets(dataset, 0.01, low_memory=True)
+        assert frequent_itemsets.is_low_memory()
+        df = frequent_itemsets.to_frame()
+        assert dict(zip(df["itemsets"], df["support"])) == expected
+
+        frequent_itemsets = FrequentItemsets(dataset, 0.01, memory_budget=1)
+        assert frequent_itemsets.is_low_memory()
+        pd.testing.assert_frame_equal(frequent_itemsets.to_frame(), expected_df)
+
+        frequent_itemsets = FrequentItemsets(dataset, 0.01,
+                                             memory_budget=1024 ** 3)
+        assert not frequent_itemsets.is_low_memory()
+        pd.testing.assert_frame_equal(frequent_itemsets.to_frame(), expected_df)
+
+    with pytest.raises(ValueError):
+        frequent_itemsets = FrequentItemsets(dataset, max_len=0)
+
+    with pytest.raises(ValueError):
+        frequent_itemsets = FrequentItemsets(dataset, memory_budget=0)
+
+    with pytest.raises(ValueError):
+        frequent_itemsets = FrequentItemsets(dataset, algorithm="fpgrowth",
+                                             low_memory=True)
+
+    with pytest.raises(ValueError):
+        frequent_itemsets = FrequentItemsets(dataset, algorithm="bitset",
+                                             low_memory=True)
+
+    with pytest.raises(ValueError):
+        frequent_itemsets = FrequentItemsets(dataset, algorithm="eclat",
+                                             memory_budget=1)
+
+
+def test_update():
+    sample_df = pd.DataFrame.from_dict(sample_dataset)
+    transaction_column = "transaction_id"
+    item_column = "item_id"
+    old_df = sample_df[sample_df[transaction_column] <= 4]
+    new_df = sample_df[sample_df[transaction_column] > 4]
+    for min_support in [0.01, 0.3, 0.5]:
+        frequent_itemsets = FrequentItemsets(
+            Dataset(old_df, transaction_column, item_column), min_support)
+        old_itemsets = frozenset(frequent_itemsets.to_frame()["itemsets"])
+        added_df, dropped_df = frequent_itemsets.update(
+            Dataset(new_df, transaction_column, item_column))
+        df = frequent_itemsets.to_frame()
+        assert df["support"].is_monotonic_decreasing
+
+        expected_df = FrequentItemsets(
+            Dataset(sample_df, transaction_column, item_column),
+            min_support).to_frame()
+        expected = dict(zip(expected_df["itemsets"], expected_df["support"]))
+        actual = dict(zip(df["itemsets"], df["support"]))
+        assert actual.keys() == expected.keys()
+        for itemset in expected:
+            assert abs(actual[itemset] - expected[itemset]) < 0.000001
+
+        assert frozenset(added_df["itemsets"]) == expected.keys() - old_itemsets
+        assert frozenset(dropped_df["itemsets"]) == old_itemsets - expected.keys()
+
+    with pytest.raises(ValueError):
+        frequent_itemsets = FrequentItemsets(
+            Dataset(old_df, transaction_column, item_column), algorithm="fpmax")
+        frequent_itemsets.update(Dataset(new_df, transaction_column, item_column))
+
+
+def test_n_jobs(monkeypatch):
+    sample_df = pd.DataFrame.from_dict(sample_dataset)
+    transaction_column = "transaction_id"
+    item_column = "item_id"
+    for sparse in [False, True]:
+        dataset = Dataset(sample_df, transaction_column, item_column,
+                          sparse=sparse)
+        for min_support in [0.01, 0.3, 0.5]:
+            frequent_itemsets = FrequentItemsets(dataset, min_support,
+                                                 n_jobs=3)
+            expected_frequent_itemsets = FrequentItemsets(dataset, min_support)
+            pd.testing.assert_frame_equal(
+                frequent_itemsets.to_frame(),
+                expected_frequent_itemsets.to_frame())
+
+    # Python 3.7 does not have multiprocessing.shared_memory.
+    monkeypatch.setattr("autoarm.frequent_itemsets.shared_memory", None)
+    for sparse in [False, True]:
+        dataset = Dataset(sample_df, transaction_column, item_column,
+                          sparse=sparse)
+        frequent_itemsets = FrequentItemsets(dataset, 0.01, n_jobs=3)
+        pd.testing.assert_frame_equal(frequent_itemsets.to_frame(),
+                                      FrequentItemsets(dataset, 0.01).to_frame())
+
+    with pytest.raises(ValueError):
+        frequent_itemsets = FrequentItemsets(dataset, n_jobs=0)
+
+    with pytest.raises(ValueError):
+        frequent_itemsets = FrequentItemsets(dataset, algorithm="fpmax",
+                                             n_jobs=2)
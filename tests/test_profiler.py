@@ -0,0 +1,80 @@
+import tracemalloc
+
+import pandas as pd
+
+from autoarm import (AssociationRules, Dataset, FrequentItemsets, Profiler,
+                     Recommender)
+
+sample_dataset = {
+    "transaction_id": 
+    [1, 1, 1, 1, 2, 2, 2, 3, 3, 4, 4, 5, 5, 5, 5, 6, 6, 6, 7, 7, 8, 8],
+    "item_id": [
+        "A", "B", "C", "D", "A", "B", "C", "A", "B", "A", "E", "F", "B", "C", "D",
+        "F","B","C", "F", "B", "A", "E"
+    ],
+}
+
+
+def test(monkeypatch):
+    sample_df = pd.DataFrame.from_dict(sample_dataset)
+    transaction_column = "transaction_id"
+    item_column = "item_id"
+    records = list()
+    with Profiler(callback=records.append, trace_memory=True) as profiler:
+        dataset = Dataset(sample_df, transaction_column, item_column)
+        frequent_itemsets = FrequentItemsets(dataset, 0.01)
+        association_rules = AssociationRules(frequent_itemsets,
+                                             min_threshold=0)
+        recommender = Recommender(association_rules)
+        recommender.recommend(["A", "B"], n=3)
+        recommender.recommend_batch([["A"], ["B", "C"]], n=3)
+    recommender.recommend(["A"], n=3)
+
+    df = profiler.to_frame()
+    assert df.columns.tolist() == ["stage", "seconds", "input_rows",
+                                   "output_rows", "itemsets_by_length",
+                                   "peak_bytes"]
+    assert df.to_dict("records") == records
+    stages = df["stage"].tolist()
+    for stage in ["Dataset.__init__", "FrequentItemsets.__init__",
+                  "AssociationRules.__init__", "Recommender.__init__",
+                  "Recommender.recommend.match", "Recommender.recommend.exclude",
+                  "Recommender.recommend.rank", "Recommender.recommend.select",
+                  "Recommender.recommend_batch.select"]:
+        assert stage in stages
+    assert stages.count("Recommender.recommend") == 1
+    assert (df["seconds"] >= 0).all()
+    assert (df["peak_bytes"] >= 0).all()
+
+    stage_by_name = df.set_index("stage")
+    assert stage_by_name.loc["Dataset.__init__", "input_rows"] == len(sample_df)
+    assert stage_by_name.loc["Dataset.__init__", "output_rows"] == 8
+    itemsets_df = frequent_itemsets.to_frame()
+    assert (stage_by_name.loc["FrequentItemsets.__init__", "output_rows"]
+            == len(itemsets_df))
+    assert (stage_by_name.loc["FrequentItemsets.__init__", "itemsets_by_length"]
+            == itemsets_df["itemsets"].map(len).value_counts().to_dict())
+    assert (stage_by_name.loc["AssociationRules.__init__", "output_rows"]
+            == len(association_rules.to_frame()))
+    assert stage_by_name.loc["Recommender.recommend", "input_rows"] == 2
+    assert stage_by_name.loc["Recommender.recommend", "output_rows"] == 3
+    assert (stage_by_name.loc["Recommender.recommend_batch", "output_rows"]
+            == 6)
+    assert (stage_by_name.loc["Recommender.__init__", "peak_bytes"]
+            >= stage_by_name.loc["Recommender.__init__.rank", "peak_bytes"])
+
+    with Profiler() as profiler:
+        recommender.recommend(["A"], n=3)
+    assert profiler.to_frame()["peak_bytes"].isna().all()
+
+    # Before Python 3.9, tracemalloc cannot reset the peak for the steps of a stage.
+    monkeypatch.delattr(tracemalloc, "reset_peak", raising=False)
+    with Profiler(trace_memory=True) as profiler:
+        Recommender(association_rules)
+        allocation = bytearray(2 ** 20)
+        del allocation
+        Recommender(association_rules)
+    stage_by_name = profiler.to_frame().set_index("stage")
+    assert stage_by_name.loc["Recommender.__init__.rank", "peak_bytes"].isna().all()
+    assert stage_by_name.loc["Recommender.__init__", "peak_bytes"].iloc[0] >= 0
+    assert pd.isna(stage_by_name.loc["Recommender.__init__", "peak_bytes"].iloc[1])
@@ -1,3 +1,8 @@
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 import pytest
 
@@ -30,6 +35,9 @@ def test():
     recommender = Recommender(association_rules)
     recommend_rules = recommender.recommend(items)
     assert type(recommend_rules) == pd.core.frame.DataFrame
+    assert list(recommend_rules.columns) == [
+        "rank", "antecedents", "consequents", "support", "confidence", "lift"]
+    assert recommend_rules["antecedents"].isna().all()
 
     recommend_rules = recommender.recommend(items,
                                             n=1,
@@ -587,3 +595,201 @@ def test_with_various_patterns_of_data():
     assert (s - 0.000001 <= recommend_rules["support"][5] <= s + 0.000001)
     assert (c - 0.000001 <= recommend_rules["confidence"][5] <= c + 0.000001)
     assert (l - 0.000001 <= recommend_rules["lift"][5] <= l + 0.000001)
+
+
+def test_with_multi_character_items():
+    sample_dataset = {
+        "transaction_id": [1, 1, 2, 2, 3, 3, 3],
+        "item_id": ["apple", "banana", "apple", "banana", "apple", "banana", "cherry"],
+    }
+    df = pd.DataFrame.from_dict(sample_dataset)
+    dataset = Dataset(df, "transaction_id", "item_id")
+    frequent_itemsets = FrequentItemsets(dataset, min_support=0.01)
+    association_rules = AssociationRules(frequent_itemsets, min_threshold=0.1)
+    recommender = Recommender(association_rules)
+
+    items = ["apple"]
+    recommend_rules = recommender.recommend(items, n=2)
+    assert (recommend_rules["antecedents"][0] == frozenset(["apple"]))
+    assert (recommend_rules["consequents"][0] == frozenset(["banana"]))
+    assert (recommend_rules["consequents"][1] == frozenset(["cherry"]))
+
+
+def test_recommend_batch():
+    sample_dataset = {
+        'transaction_id':
+        [1, 1, 1, 2, 2, 3, 3, 3, 4, 4, 5, 5, 5, 6, 6, 6, 6, 7, 7],
+        'item_id': [
+            "X", "Y", "Z", "X", "B", "Y", "A", "C", "A", "C", "X", "Y", "Z",
+            "X", "Y", "B", "A", "X", "B"
+        ],
+    }
+    df = pd.DataFrame.from_dict(sample_dataset)
+    dataset = Dataset(df, "transaction_id", "item_id")
+    frequent_itemsets = FrequentItemsets(dataset, min_support=0.01)
+    association_rules = AssociationRules(frequent_itemsets,
+                                         metric="confidence",
+                                         min_threshold=0.1)
+    recommender = Recommender(association_rules)
+
+    baskets = [["X"], ["X", "Y"], ["other"], ["A", "other"]]
+    for metric in ["confidence", "lift"]:
+        for allow_from_items in [False, True]:
+            recommend_rules = recommender.recommend_batch(
+                baskets, n=6, metric=metric, allow_from_items=allow_from_items)
+            assert type(recommend_rules) == pd.core.frame.DataFrame
+            assert len(recommend_rules) == len(baskets) * 6
+            for basket_id, items in enumerate(baskets):
+                basket_rules = recommend_rules[
+                    recommend_rules["basket_id"] == basket_id].reset_index(drop=True)
+                assert list(basket_rules["rank"]) == list(range(1, 7))
+                if items == ["other"]:
+                    assert basket_rules["antecedents"].isna().all()
+                    continue
+                expected_rules = recommender.recommend(
+                    items, n=6, metric=metric, allow_from_items=allow_from_items)
+                pd.testing.assert_frame_equal(
+                    basket_rules.drop(columns="basket_id"), expected_rules,
+                    check_dtype=False)
+
+    with pytest.raises(ValueError):
+        recommender.recommend_batch([["X"], []])
+
+    with pytest.raises(ValueError):
+        recommender.recommend_batch([["X"]], n=0)
+
+    with pytest.raises(ValueError):
+        recommender.recommend_batch([["X"]], metric="other")
+
+
+def test_sort_by_columns():
+    sample_dataset = {
+        'transaction_id':
+        [1, 1, 1, 2, 2, 3, 3, 3, 4, 4, 5, 5, 5, 6, 6, 6, 6, 7, 7],
+        'item_id': [
+            "X", "Y", "Z", "X", "B", "Y", "A", "C", "A", "C", "X", "Y", "Z",
+            "X", "Y", "B", "A", "X", "B"
+        ],
+    }
+    df = pd.DataFrame.from_dict(sample_dataset)
+    dataset = Dataset(df, "transaction_id", "item_id")
+    frequent_itemsets = FrequentItemsets(dataset, min_support=0.01)
+    association_rules = AssociationRules(frequent_itemsets,
+                                         metric="confidence",
+                                         min_threshold=0.1)
+
+    recommender = Recommender(association_rules, max_sort_orders=1)
+    items = ["X", "Y"]
+    for sort_by_columns in [["support"], ["support", "lift"], ["support"]]:
+        recommend_rules = recommender.recommend(
+            items, n=6, sort_by_columns=sort_by_columns)
+        expected_rules = Recommender(association_rules).recommend(
+            items, n=6, sort_by_columns=sort_by_columns)
+        pd.testing.assert_frame_equal(recommend_rules, expected_rules)
+        supports = recommend_rules["support"].dropna().tolist()
+        assert supports == sorted(supports, reverse=True)
+
+    recommend_rules = recommender.recommend(
+        items, n=6, sort_by_columns=["lift", "support", "confidence"])
+    expected_rules = recommender.recommend(items, n=6, metric="lift")
+    pd.testing.assert_frame_equal(recommend_rules, expected_rules)
+
+    sort_orders = [["support"], ["confidence"], ["support", "lift"],
+                   ["lift", "confidence"]]
+    expected = [
+        Recommender(association_rules).recommend(
+            items, n=6, sort_by_columns=sort_by_columns)
+        for sort_by_columns in sort_orders
+    ]
+    # The kept ranks sleep on lookup, so that the threads interleave there.
+    class SlowOrderedDict(OrderedDict):
+        def __contains__(self, key):
+            is_contained = super().__contains__(key)
+            time.sleep(0.001)
+            return is_contained
+
+    recommender = Recommender(association_rules, max_sort_orders=1)
+    recommender._Recommender__ranks_by_sort_columns = SlowOrderedDict()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(
+            lambda i: recommender.recommend(
+                items, n=6, sort_by_columns=sort_orders[i % len(sort_orders)]),
+            range(200)))
+    for i, recommend_rules in enumerate(results):
+        pd.testing.assert_frame_equal(recommend_rules,
+                                      expected[i % len(sort_orders)])
+
+    with pytest.raises(ValueError):
+        Recommender(association_rules, max_sort_orders=-1)
+
+
+def test_cache():
+    sample_df = pd.DataFrame.from_dict(sample_dataset)
+    dataset = Dataset(sample_df, "transaction_id", "item_id")
+    frequent_itemsets = FrequentItemsets(dataset, min_support=0.01)
+    association_rules = AssociationRules(frequent_itemsets, min_threshold=0)
+
+    recommender = Recommender(association_rules, cache_size=2)
+    expected_rules = Recommender(association_rules).recommend(["A"], n=3)
+    recommend_rules = recommender.recommend(["A"], n=3)
+    pd.testing.assert_frame_equal(recommend_rules, expected_rules)
+    recommend_rules["support"] = 0
+    pd.testing.assert_frame_equal(
+        recommender.recommend(["A"], n=3), expected_rules)
+    assert recommender.cache_info() == {
+        "hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+    recommender.recommend(["A"], n=3, metric="lift")
+    recommender.recommend(["B"], n=3)
+    assert recommender.cache_info() == {
+        "hits": 1, "misses": 3, "evictions": 1, "size": 2}
+
+    recommender.clear_cache()
+    assert recommender.cache_info() == {
+        "hits": 0, "misses": 0, "evictions": 0, "size": 0}
+
+    recommender = Recommender(association_rules, cache_size=2, cache_ttl=0.01)
+    recommender.recommend(["A"], n=3)
+    time.sleep(0.02)
+    recommender.recommend(["A"], n=3)
+    assert recommender.cache_info() == {
+        "hits": 0, "misses": 2, "evictions": 1, "size": 1}
+
+    with pytest.raises(ValueError):
+        Recommender(association_rules, cache_size=-1)
+
+    with pytest.raises(ValueError):
+        Recommender(association_rules, cache_size=2, cache_ttl=0)
+
+
+def test_save_and_load(tmp_path):
+    sample_df = pd.DataFrame.from_dict(sample_dataset)
+    dataset = Dataset(sample_df, "transaction_id", "item_id")
+    frequent_itemsets = FrequentItemsets(dataset, min_support=0.01)
+    association_rules = AssociationRules(frequent_itemsets, min_threshold=0)
+    recommender = Recommender(association_rules, n=3, metric="lift")
+    path = str(tmp_path / "recommender")
+    recommender.save(path)
+
+    baskets = [["A"], ["B", "F"], ["other"]]
+    for mmap in [True, False]:
+        loaded_recommender = Recommender.load(path, mmap=mmap)
+        for items in baskets:
+            pd.testing.assert_frame_equal(
+                loaded_recommender.recommend(items), recommender.recommend(items))
+            pd.testing.assert_frame_equal(
+                loaded_recommender.recommend(items, sort_by_columns=["support"]),
+                recommender.recommend(items, sort_by_columns=["support"]))
+        pd.testing.assert_frame_equal(
+            loaded_recommender.recommend_batch(baskets),
+            recommender.recommend_batch(baskets))
+
+    tuple_df = sample_df.assign(
+        item_id=[(item, 1) for item in sample_df["item_id"]])
+    dataset = Dataset(tuple_df, "transaction_id", "item_id")
+    frequent_itemsets = FrequentItemsets(dataset, min_support=0.01)
+    recommender = Recommender(AssociationRules(frequent_itemsets, min_threshold=0))
+    path = str(tmp_path / "tuple_recommender")
+    with pytest.raises(ValueError):
+        recommender.save(path)
+    assert not os.path.exists(path)